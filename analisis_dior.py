@@ -1,12 +1,11 @@
+import heapq
+from functools import partial
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from scipy.stats import spearmanr
+from sklearn.cluster import KMeans, MiniBatchKMeans
 import streamlit as st
 
 # Mapeo de respuestas de la encuesta a valores numéricos
@@ -67,6 +66,59 @@ DEMOGRAFICAS = [
     "NICHO"
 ]
 
+# Umbrales de la escala 1-3 y la interpretación de cada tramo
+UMBRALES_INTERPRETACION = [1.5, 2.5]
+NIVELES_INTERPRETACION = np.array(["Desfavorable", "Neutral", "Favorable"])
+
+# Columnas de texto de baja cardinalidad que se guardan como categorías
+COLUMNAS_CATEGORICAS = DEMOGRAFICAS + ["ROL"]
+
+# Etiquetas de cada valor numérico de respuesta (0 = sin respuesta)
+ETIQUETAS_VALORES = np.array(["0", "EN DESACUERDO", "NI DEACUERDO, NI EN DESACUERDO", "DE ACUERDO"], dtype=object)
+
+# Número de registros a partir del cual se usa MiniBatchKMeans
+UMBRAL_MINIBATCH = 500
+
+# Etapas que ejecuta ejecutar_analisis_completo por defecto
+ETAPAS_ANALISIS = ("descriptivo", "dimensiones", "clusters", "comparativo")
+
+# Colores y ejes compartidos por las figuras
+COLORES_RESPUESTAS = {
+    "DE ACUERDO": "#2ca02c",
+    "NI DEACUERDO, NI EN DESACUERDO": "#ffbb78",
+    "EN DESACUERDO": "#d62728"
+}
+COLORES_INTERPRETACION = {
+    "Favorable": "#2ca02c",
+    "Neutral": "#ffbb78",
+    "Desfavorable": "#d62728"
+}
+COLORES_CONCORDANCIA = {
+    "Alta": "#2ca02c",   # Verde
+    "Media": "#ffbb78",  # Naranja
+    "Baja": "#d62728"    # Rojo
+}
+COLORES_ROLES = {"Principal": "#1f77b4", "Auxiliar": "#ff7f0e"}
+EJE_PROMEDIO = dict(range=[0, 3.2])
+
+def huella_dataframe(df):
+    """
+    Calcula una huella del contenido de un DataFrame para usarla como clave de caché.
+    
+    Args:
+        df (DataFrame): DataFrame a identificar
+        
+    Returns:
+        tuple: Columnas del DataFrame y hash de sus filas (incluido el índice)
+    """
+    return (tuple(df.columns), pd.util.hash_pandas_object(df, index=True).values.tobytes())
+
+# Funciones de hash para las funciones cacheadas que reciben DataFrames
+HASH_FUNCS = {
+    pd.DataFrame: huella_dataframe
+}
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def preparar_datos(df):
     """
     Prepara los datos para el análisis, convirtiendo las respuestas 
@@ -81,15 +133,184 @@ def preparar_datos(df):
     if df is None or df.empty:
         return None
         
-    df_prep = df.copy()
+    # Copia superficial: las columnas de preguntas se reemplazan por arreglos nuevos
+    # y el resto de columnas se comparte con el DataFrame original
+    df_prep = df.copy(deep=False)
+    
+    # Convertir respuestas de texto a valores numéricos en un solo paso:
+    # las respuestas se codifican como categorías (código -1 si no coinciden)
+    # y los códigos se traducen con una tabla de consulta (0 = sin respuesta)
+    columnas_dimension = calcular_columnas_dimension(df_prep.columns)
+    columnas = [p for preguntas in columnas_dimension.values() for p in preguntas]
+    if columnas:
+        codigos = pd.Categorical(
+            df_prep[columnas].to_numpy().ravel(),
+            categories=list(MAPEO_RESPUESTAS)
+        ).codes
+        valores = np.array([0] + list(MAPEO_RESPUESTAS.values()), dtype=np.int8)
+        matriz = valores[codigos + 1].reshape(len(df_prep), len(columnas))
+        df_prep[columnas] = matriz
+    else:
+        matriz = np.zeros((len(df_prep), 0), dtype=np.int8)
+    
+    # Guardar la matriz contigua de respuestas para reutilizarla en los análisis,
+    # junto con el índice y las columnas a los que corresponde
+    df_prep.attrs["matriz_respuestas"] = matriz
+    df_prep.attrs["indice_respuestas"] = df_prep.index
+    df_prep.attrs["columnas_respuestas"] = df_prep.columns
+    df_prep.attrs["columnas_dimension"] = columnas_dimension
+    df_prep.attrs["rangos_dimensiones"] = calcular_rangos_dimensiones(columnas_dimension)
+    df_prep.attrs["promedios_fila"] = calcular_promedios_fila(matriz, df_prep.attrs["rangos_dimensiones"])
+    
+    # Columnas de baja cardinalidad como categorías (códigos enteros)
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df_prep.columns:
+            df_prep[col] = df_prep[col].astype("category")
+    
+    return df_prep
+
+def calcular_columnas_dimension(columnas):
+    """
+    Determina qué preguntas de cada dimensión existen entre las columnas dadas.
+    
+    Args:
+        columnas (Index): Columnas del DataFrame
+        
+    Returns:
+        dict: Diccionario {dimensión: lista de preguntas existentes} con las
+              dimensiones que tienen preguntas
+    """
+    existentes = set(columnas)
+    columnas_dimension = {}
     
-    # Convertir respuestas de texto a valores numéricos
     for dimension, preguntas in DIMENSIONES.items():
-        for pregunta in preguntas:
-            if pregunta in df_prep.columns:
-                df_prep[pregunta] = df_prep[pregunta].map(MAPEO_RESPUESTAS).fillna(0).astype(int)
+        preguntas_existentes = [p for p in preguntas if p in existentes]
+        
+        if preguntas_existentes:
+            columnas_dimension[dimension] = preguntas_existentes
     
-    return df_prep
+    return columnas_dimension
+
+def calcular_rangos_dimensiones(columnas_dimension):
+    """
+    Calcula el rango de columnas que ocupa cada dimensión dentro de la matriz
+    de respuestas (las preguntas quedan agrupadas por dimensión).
+    
+    Args:
+        columnas_dimension (dict): Preguntas existentes de cada dimensión
+        
+    Returns:
+        dict: Diccionario {dimensión: slice}
+    """
+    rangos = {}
+    inicio = 0
+    
+    for dimension, preguntas in columnas_dimension.items():
+        rangos[dimension] = slice(inicio, inicio + len(preguntas))
+        inicio += len(preguntas)
+    
+    return rangos
+
+def obtener_columnas_dimension(df_prep):
+    """
+    Obtiene las preguntas existentes de cada dimensión, calculadas una sola vez
+    en preparar_datos.
+    
+    Args:
+        df_prep (DataFrame): DataFrame preparado con valores numéricos
+        
+    Returns:
+        dict: Diccionario {dimensión: lista de preguntas existentes}
+    """
+    columnas_dimension = df_prep.attrs.get("columnas_dimension")
+    columnas = df_prep.attrs.get("columnas_respuestas")
+    
+    if columnas_dimension is None or columnas is None or not df_prep.columns.equals(columnas):
+        columnas_dimension = calcular_columnas_dimension(df_prep.columns)
+    
+    return columnas_dimension
+
+def respuestas_precalculadas_vigentes(df_prep):
+    """
+    Indica si la matriz de respuestas guardada en preparar_datos corresponde
+    todavía al DataFrame. Los attrs se propagan a los DataFrames derivados
+    (sort_values, filtros, copias...), así que se exige el mismo índice, en el
+    mismo orden, y las mismas columnas.
+    
+    Args:
+        df_prep (DataFrame): DataFrame preparado con valores numéricos
+        
+    Returns:
+        bool: True si se puede reutilizar la matriz guardada
+    """
+    indice = df_prep.attrs.get("indice_respuestas")
+    columnas = df_prep.attrs.get("columnas_respuestas")
+    
+    return (
+        df_prep.attrs.get("matriz_respuestas") is not None
+        and indice is not None
+        and columnas is not None
+        and df_prep.index.equals(indice)
+        and df_prep.columns.equals(columnas)
+    )
+
+def obtener_matriz_respuestas(df_prep):
+    """
+    Obtiene la matriz numérica (N, Q) de respuestas y los rangos por dimensión.
+    
+    Usa la matriz calculada en preparar_datos si corresponde al índice y a las
+    columnas del DataFrame; en otro caso la construye a partir de sus columnas.
+    
+    Args:
+        df_prep (DataFrame): DataFrame preparado con valores numéricos
+        
+    Returns:
+        tuple: (matriz de respuestas, diccionario {dimensión: slice})
+    """
+    if respuestas_precalculadas_vigentes(df_prep):
+        return df_prep.attrs["matriz_respuestas"], df_prep.attrs["rangos_dimensiones"]
+    
+    columnas_dimension = obtener_columnas_dimension(df_prep)
+    columnas = [p for preguntas in columnas_dimension.values() for p in preguntas]
+    return df_prep[columnas].to_numpy(), calcular_rangos_dimensiones(columnas_dimension)
+
+def calcular_promedios_fila(matriz, rangos):
+    """
+    Calcula el promedio de cada dimensión para cada fila en una sola pasada.
+    
+    Args:
+        matriz (ndarray): Matriz (N, Q) de respuestas
+        rangos (dict): Diccionario {dimensión: slice} de columnas de cada dimensión
+        
+    Returns:
+        ndarray: Matriz (N, D) con los promedios por fila, en el orden de rangos
+    """
+    if not rangos:
+        return np.zeros((len(matriz), 0))
+    
+    inicios = [rango.start for rango in rangos.values()]
+    longitudes = np.array([rango.stop - rango.start for rango in rangos.values()])
+    
+    return np.add.reduceat(matriz, inicios, axis=1, dtype=np.float64) / longitudes
+
+def obtener_promedios_fila(df_prep):
+    """
+    Obtiene los promedios por fila de cada dimensión calculados en preparar_datos,
+    o los recalcula si ya no corresponden al DataFrame.
+    
+    Args:
+        df_prep (DataFrame): DataFrame preparado con valores numéricos
+        
+    Returns:
+        tuple: (matriz (N, D) de promedios por fila, lista de dimensiones)
+    """
+    matriz, rangos = obtener_matriz_respuestas(df_prep)
+    promedios_fila = df_prep.attrs.get("promedios_fila")
+    
+    if promedios_fila is None or not respuestas_precalculadas_vigentes(df_prep):
+        promedios_fila = calcular_promedios_fila(matriz, rangos)
+    
+    return promedios_fila, list(rangos)
 
 def calcular_promedios_por_dimension(df):
     """
@@ -101,17 +322,9 @@ def calcular_promedios_por_dimension(df):
     Returns:
         dict: Diccionario con los promedios por dimensión
     """
-    promedios = {}
+    promedios_fila, dimensiones = obtener_promedios_fila(df)
     
-    for dimension, preguntas in DIMENSIONES.items():
-        # Filtrar solo preguntas existentes en el DataFrame
-        preguntas_existentes = [p for p in preguntas if p in df.columns]
-        
-        if preguntas_existentes:
-            # Calcular promedio de la dimensión
-            promedios[dimension] = df[preguntas_existentes].mean(axis=1).mean()
-    
-    return promedios
+    return dict(zip(dimensiones, promedios_fila.mean(axis=0)))
 
 def interpretar_promedio(valor):
     """
@@ -130,7 +343,23 @@ def interpretar_promedio(valor):
     else:
         return "Favorable"
 
+def interpretar_promedios(valores):
+    """
+    Interpreta un conjunto de valores promedio según la escala de 1-3.
+    
+    Versión vectorizada de interpretar_promedio: clasifica todos los valores
+    en una sola operación.
+    
+    Args:
+        valores (array-like): Valores promedio
+        
+    Returns:
+        ndarray: Interpretación de cada valor
+    """
+    return NIVELES_INTERPRETACION[np.digitize(valores, UMBRALES_INTERPRETACION)]
+
 # 3.1 Análisis descriptivo básico
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analisis_descriptivo(df, df_prep):
     """
     Realiza un análisis descriptivo básico de los datos.
@@ -144,60 +373,84 @@ def analisis_descriptivo(df, df_prep):
     """
     resultados = {}
     
+    # Las columnas demográficas de df_prep ya son categóricas, así que los
+    # conteos operan sobre sus códigos enteros
     # Número de comedores
-    if "NOMBRE_COMEDOR" in df.columns:
-        resultados["total_comedores"] = df["NOMBRE_COMEDOR"].nunique()
+    if "NOMBRE_COMEDOR" in df_prep.columns:
+        resultados["total_comedores"] = df_prep["NOMBRE_COMEDOR"].nunique()
     else:
         resultados["total_comedores"] = len(df)
     
     # Distribución por comuna
-    if "COMUNA" in df.columns:
-        comunas = df["COMUNA"].value_counts().reset_index()
-        comunas.columns = ["Comuna", "Cantidad"]
-        resultados["distribucion_comunas"] = comunas
+    if "COMUNA" in df_prep.columns:
+        resultados["distribucion_comunas"] = contar_por_categoria(df_prep["COMUNA"], "Comuna")
     
     # Distribución por nodo
-    if "NODO" in df.columns:
-        nodos = df["NODO"].value_counts().reset_index()
-        nodos.columns = ["Nodo", "Cantidad"]
-        resultados["distribucion_nodos"] = nodos
+    if "NODO" in df_prep.columns:
+        resultados["distribucion_nodos"] = contar_por_categoria(df_prep["NODO"], "Nodo")
     
     # Distribución por nicho
-    if "NICHO" in df.columns:
-        nichos = df["NICHO"].value_counts().reset_index()
-        nichos.columns = ["Nicho", "Cantidad"]
-        resultados["distribucion_nichos"] = nichos
+    if "NICHO" in df_prep.columns:
+        resultados["distribucion_nichos"] = contar_por_categoria(df_prep["NICHO"], "Nicho")
     
-    # Distribución general de respuestas
-    respuestas_todas = []
+    # Distribución general de respuestas (conteo directo sobre la matriz)
+    matriz, _ = obtener_matriz_respuestas(df_prep)
     
-    for dimension, preguntas in DIMENSIONES.items():
-        for pregunta in preguntas:
-            if pregunta in df_prep.columns:
-                values = df_prep[pregunta].dropna()
-                respuestas_todas.extend(values)
-    
-    if respuestas_todas:
-        conteo = pd.Series(respuestas_todas).value_counts().sort_index()
-        
-        # Mapear valores numéricos a etiquetas
-        etiquetas = {
-            1: "EN DESACUERDO",
-            2: "NI DEACUERDO, NI EN DESACUERDO",
-            3: "DE ACUERDO"
-        }
-        
-        distribucion = pd.DataFrame({
-            "Respuesta": [etiquetas.get(i, str(i)) for i in conteo.index],
-            "Cantidad": conteo.values,
-            "Porcentaje": (conteo.values / sum(conteo.values) * 100).round(2)
-        })
-        
-        resultados["distribucion_respuestas"] = distribucion
+    if matriz.size:
+        conteo = np.bincount(matriz.ravel(), minlength=len(ETIQUETAS_VALORES))
+        resultados["distribucion_respuestas"] = pd.DataFrame(construir_distribucion(conteo))
     
     return resultados
 
+def contar_por_categoria(serie, nombre):
+    """
+    Cuenta las apariciones de cada valor de una columna usando sus códigos de categoría.
+    
+    Args:
+        serie (Series): Columna a contar
+        nombre (str): Nombre de la columna con los valores en el resultado
+        
+    Returns:
+        DataFrame: Valores y su cantidad, de mayor a menor
+    """
+    categorias = serie.astype("category").cat
+    codigos = categorias.codes.to_numpy()
+    conteos = np.bincount(codigos[codigos >= 0], minlength=len(categorias.categories))
+    
+    # Ordenar de mayor a menor cantidad, omitiendo valores sin apariciones
+    orden = np.argsort(-conteos, kind="stable")
+    orden = orden[conteos[orden] > 0]
+    
+    return pd.DataFrame({
+        nombre: categorias.categories[orden],
+        "Cantidad": conteos[orden]
+    })
+
+def construir_distribucion(conteo):
+    """
+    Construye la distribución de respuestas a partir de un conteo por valor.
+    
+    Se devuelve como diccionario de arreglos; quien necesite una tabla puede
+    convertirla con pd.DataFrame(distribucion).
+    
+    Args:
+        conteo (ndarray): Cantidad de respuestas por valor numérico (0 = sin respuesta)
+        
+    Returns:
+        dict: Distribución con claves Respuesta, Cantidad y Porcentaje
+    """
+    # Solo se muestran los valores que aparecen en los datos
+    valores = np.flatnonzero(conteo)
+    cantidades = conteo[valores]
+    
+    return {
+        "Respuesta": ETIQUETAS_VALORES[valores].tolist(),
+        "Cantidad": cantidades,
+        "Porcentaje": (cantidades / cantidades.sum() * 100).round(2)
+    }
+
 # 3.2 Análisis por dimensiones
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analisis_por_dimensiones(df_prep):
     """
     Realiza un análisis por dimensiones.
@@ -218,7 +471,7 @@ def analisis_por_dimensiones(df_prep):
             "Dimensión": list(promedios.keys()),
             "Promedio": list(promedios.values())
         })
-        promedios_df["Interpretación"] = promedios_df["Promedio"].apply(interpretar_promedio)
+        promedios_df["Interpretación"] = interpretar_promedios(promedios_df["Promedio"].to_numpy())
         promedios_df = promedios_df.sort_values("Promedio", ascending=False)
         
         resultados["promedios_dimensiones"] = promedios_df
@@ -233,40 +486,35 @@ def analisis_por_dimensiones(df_prep):
     
     # Análisis detallado por pregunta
     analisis_preguntas = {}
-    
-    for dimension, preguntas in DIMENSIONES.items():
-        analisis_dimension = {}
-        
-        for pregunta in preguntas:
-            if pregunta in df_prep.columns:
-                valores = df_prep[pregunta].dropna()
-                
-                if len(valores) > 0:
-                    conteo = valores.value_counts().sort_index()
-                    porcentajes = (conteo / conteo.sum() * 100).round(2)
-                    
-                    # Mapear valores numéricos a etiquetas
-                    etiquetas = {
-                        1: "EN DESACUERDO",
-                        2: "NI DEACUERDO, NI EN DESACUERDO",
-                        3: "DE ACUERDO"
-                    }
-                    
-                    distribucion = pd.DataFrame({
-                        "Respuesta": [etiquetas.get(i, str(i)) for i in conteo.index],
-                        "Cantidad": conteo.values,
-                        "Porcentaje": porcentajes.values
-                    })
-                    
-                    promedio = valores.mean()
-                    
-                    analisis_dimension[pregunta] = {
-                        "distribucion": distribucion,
-                        "promedio": promedio,
-                        "interpretacion": interpretar_promedio(promedio)
-                    }
-        
-        if analisis_dimension:
+    matriz, rangos = obtener_matriz_respuestas(df_prep)
+    
+    if len(matriz) > 0:
+        # Promedio e interpretación de todas las preguntas a la vez
+        promedios_preguntas = matriz.mean(axis=0)
+        interpretaciones = interpretar_promedios(promedios_preguntas).tolist()
+        
+        # Conteos (Q, valores) de todas las preguntas en una sola pasada: cada
+        # pregunta se desplaza a su propio bloque de valores antes de contar
+        n_preguntas = matriz.shape[1]
+        n_valores = len(ETIQUETAS_VALORES)
+        desplazamientos = np.arange(n_preguntas) * n_valores
+        conteos = np.bincount(
+            (matriz + desplazamientos).ravel(), minlength=n_preguntas * n_valores
+        ).reshape(n_preguntas, n_valores)
+        
+        columnas_dimension = obtener_columnas_dimension(df_prep)
+        
+        for dimension, rango in rangos.items():
+            analisis_dimension = {}
+            preguntas = columnas_dimension[dimension]
+            
+            for indice, pregunta in enumerate(preguntas, start=rango.start):
+                analisis_dimension[pregunta] = {
+                    "distribucion": construir_distribucion(conteos[indice]),
+                    "promedio": promedios_preguntas[indice],
+                    "interpretacion": interpretaciones[indice]
+                }
+            
             analisis_preguntas[dimension] = analisis_dimension
     
     resultados["analisis_preguntas"] = analisis_preguntas
@@ -276,6 +524,53 @@ def analisis_por_dimensiones(df_prep):
 
 
 # 3.4 Análisis de conglomerados (clusters)
+@st.cache_resource(show_spinner=False)
+def ajustar_modelos_clusters(X, n_clusters):
+    """
+    Estandariza los datos, obtiene sus componentes principales y ajusta el K-means.
+    
+    Los modelos ajustados se guardan como recurso de Streamlit, de modo que solo
+    se vuelven a ajustar cuando cambian los datos o el número de clusters.
+    
+    Args:
+        X (ndarray): Matriz (N, D) de promedios por dimensión en float32
+        n_clusters (int): Número de clusters a generar
+        
+    Returns:
+        tuple: (varianza_explicada, kmeans, X_pca) con la proporción de varianza de
+               cada componente, el modelo ajustado y los componentes principales de cada fila
+    """
+    # Escalar datos (media 0 y desviación 1 por columna; columnas constantes sin escalar)
+    media = X.mean(axis=0)
+    desviacion = X.std(axis=0)
+    desviacion[desviacion == 0] = 1
+    X_scaled = ((X - media) / desviacion).astype(np.float32, copy=False)
+    
+    # Reducir dimensionalidad una sola vez: los componentes principales se usan
+    # tanto para el clustering como para la visualización
+    n_componentes = min(max(n_clusters, 2), X_scaled.shape[1], X_scaled.shape[0])
+    # Los datos ya están centrados, así que la SVD equivale a la PCA
+    U, S, _ = np.linalg.svd(X_scaled, full_matrices=False)
+    # Fijar el signo de cada componente (mayor valor absoluto positivo) para que
+    # la proyección sea determinista
+    signos = np.sign(U[np.abs(U).argmax(axis=0), np.arange(U.shape[1])])
+    signos[signos == 0] = 1
+    X_pca = U[:, :n_componentes] * (S[:n_componentes] * signos[:n_componentes])
+    varianza = S ** 2
+    varianza_explicada = varianza[:n_componentes] / varianza.sum() if varianza.sum() > 0 else np.zeros(n_componentes)
+    
+    # Aplicar K-means (por mini-lotes si hay muchos registros)
+    if X_pca.shape[0] >= UMBRAL_MINIBATCH:
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_clusters, batch_size=min(256, X_pca.shape[0]), n_init=3, random_state=42
+        )
+    else:
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init="auto")
+    kmeans.fit(X_pca)
+    
+    return varianza_explicada, kmeans, X_pca
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analisis_clusters(df, df_prep, n_clusters=3):
     """
     Realiza un análisis de conglomerados para identificar perfiles de comedores.
@@ -290,39 +585,31 @@ def analisis_clusters(df, df_prep, n_clusters=3):
     """
     resultados = {}
     
-    # Recopilar todas las preguntas
-    todas_preguntas = []
-    for dimension, preguntas in DIMENSIONES.items():
-        todas_preguntas.extend([p for p in preguntas if p in df_prep.columns])
+    # Promedios por fila de cada dimensión (sin valores faltantes)
+    _, rangos = obtener_matriz_respuestas(df_prep)
+    promedios_fila, _ = obtener_promedios_fila(df_prep)
     
-    if todas_preguntas:
-        # Preparar datos para clustering
-        X = df_prep[todas_preguntas].fillna(df_prep[todas_preguntas].mean())
-        
-        # Escalar datos
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        # Aplicar K-means
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        clusters = kmeans.fit_predict(X_scaled)
+    if promedios_fila.shape[1]:
+        # Preparar datos para clustering: los perfiles se interpretan por dimensión,
+        # así que se agrupa sobre los D promedios por fila (float32 contiguo)
+        X = np.ascontiguousarray(promedios_fila, dtype=np.float32)
         
-        # Añadir etiquetas de cluster al DataFrame
-        df_clusters = df.copy()
-        df_clusters["Cluster"] = clusters
+        # Escalar, reducir y agrupar (modelos ajustados cacheados por datos y n_clusters)
+        varianza_explicada, kmeans, X_pca = ajustar_modelos_clusters(X, n_clusters)
+        clusters = kmeans.labels_
         
-        resultados["clusters"] = df_clusters
+        # Etiquetas de cluster alineadas con el índice del DataFrame original
+        resultados["clusters"] = pd.DataFrame({"Cluster": clusters}, index=df.index)
         resultados["n_clusters"] = n_clusters
         resultados["kmeans_model"] = kmeans
         
-        # Reducir dimensionalidad para visualización
-        pca = PCA(n_components=2)
-        X_pca = pca.fit_transform(X_scaled)
-        
-        # Crear DataFrame para visualización
+        # Crear DataFrame para visualización (dos primeros componentes; si solo hay
+        # un componente, p. ej. con una sola dimensión, el segundo se rellena con ceros)
+        componentes = np.zeros((X_pca.shape[0], 2), dtype=np.float32)
+        componentes[:, :min(2, X_pca.shape[1])] = X_pca[:, :2]
         df_pca = pd.DataFrame({
-            "PCA1": X_pca[:, 0],
-            "PCA2": X_pca[:, 1],
+            "PCA1": componentes[:, 0],
+            "PCA2": componentes[:, 1],
             "Cluster": clusters
         })
         
@@ -331,52 +618,120 @@ def analisis_clusters(df, df_prep, n_clusters=3):
             df_pca["Comedor"] = df["NOMBRE_COMEDOR"].values
         
         resultados["pca_data"] = df_pca
-        resultados["pca_varianza"] = pca.explained_variance_ratio_
+        resultados["pca_varianza"] = varianza_explicada[:2]
         
-        # Calcular perfiles de cada cluster
+        # Calcular perfiles de cada cluster a partir de los promedios por fila
+        # de cada dimensión, agrupados por cluster en una sola pasada
         perfiles = {}
         
+        conteos = np.bincount(clusters, minlength=n_clusters)
+        promedios_dimensiones = calcular_promedios_por_grupo(clusters, n_clusters, df_prep)
+        
+        # Promedio general: promedio de las dimensiones ponderado por su número de preguntas
+        preguntas_por_dimension = [rango.stop - rango.start for rango in rangos.values()]
+        promedios_generales = np.average(
+            np.column_stack(list(promedios_dimensiones.values())), axis=1, weights=preguntas_por_dimension
+        )
+        
+        # Comedores como códigos de categoría: los nombres se guardan una sola vez
+        # y cada perfil solo guarda los códigos de sus comedores
+        if "NOMBRE_COMEDOR" in df_prep.columns:
+            comedores = df_prep["NOMBRE_COMEDOR"].astype("category").cat
+            codigos_comedor = comedores.codes.to_numpy()
+            resultados["categorias_comedores"] = comedores.categories
+        
         for cluster_id in range(n_clusters):
-            # Filtrar datos de este cluster
-            mask = clusters == cluster_id
-            df_cluster = df_prep[mask]
-            
             # Número de comedores en el cluster
             perfiles[cluster_id] = {
-                "n_comedores": mask.sum()
+                "n_comedores": conteos[cluster_id]
             }
             
             # Promedios por dimensión
-            promedios_dim = {}
-            
-            for dimension, preguntas in DIMENSIONES.items():
-                pregs_existentes = [p for p in preguntas if p in df_prep.columns]
-                
-                if pregs_existentes:
-                    promedio = df_cluster[pregs_existentes].mean(axis=1).mean()
-                    promedios_dim[dimension] = promedio
+            promedios_dim = {
+                dimension: promedios[cluster_id]
+                for dimension, promedios in promedios_dimensiones.items()
+            }
             
             perfiles[cluster_id]["promedios_dimensiones"] = promedios_dim
             
-            # Fortalezas (dimensiones con mayor puntuación)
-            sorted_dims = sorted(promedios_dim.items(), key=lambda x: x[1], reverse=True)
-            perfiles[cluster_id]["fortalezas"] = sorted_dims[:3]
-            
-            # Debilidades (dimensiones con menor puntuación)
-            perfiles[cluster_id]["debilidades"] = sorted_dims[-3:]
+            # Fortalezas y debilidades (dimensiones con mayor y menor puntuación)
+            fortalezas, debilidades = extremos_dimensiones(promedios_dim)
+            perfiles[cluster_id]["fortalezas"] = fortalezas
+            perfiles[cluster_id]["debilidades"] = debilidades
             
             # Promedio general del cluster
-            perfiles[cluster_id]["promedio_general"] = df_cluster[todas_preguntas].mean().mean()
+            perfiles[cluster_id]["promedio_general"] = promedios_generales[cluster_id]
             
-            # Listado de comedores en el cluster
-            if "NOMBRE_COMEDOR" in df.columns:
-                perfiles[cluster_id]["comedores"] = df[mask]["NOMBRE_COMEDOR"].tolist()
+            # Listado de comedores en el cluster (códigos, ver categorias_comedores)
+            if "NOMBRE_COMEDOR" in df_prep.columns:
+                perfiles[cluster_id]["codigos_comedores"] = codigos_comedor[clusters == cluster_id]
         
         resultados["perfiles_clusters"] = perfiles
     
     return resultados
 
+def extremos_dimensiones(promedios_dim, k=3):
+    """
+    Obtiene las k dimensiones con mayor y con menor puntuación sin ordenar todas.
+    
+    Args:
+        promedios_dim (dict): Diccionario {dimensión: promedio}
+        k (int): Número de dimensiones en cada extremo
+        
+    Returns:
+        tuple: (fortalezas, debilidades) como listas de (dimensión, promedio),
+               ambas ordenadas de mayor a menor puntuación
+    """
+    nombres = list(promedios_dim.keys())
+    valores = np.fromiter(promedios_dim.values(), dtype=np.float64, count=len(nombres))
+    k = min(k, len(valores))
+    
+    if k == 0:
+        return [], []
+    
+    # Seleccionar los k mayores y los k menores en O(D) y ordenar solo esos
+    mayores = np.argpartition(-valores, k - 1)[:k]
+    mayores = mayores[np.argsort(-valores[mayores], kind="stable")]
+    menores = np.argpartition(valores, k - 1)[:k]
+    menores = menores[np.argsort(-valores[menores], kind="stable")]
+    
+    fortalezas = [(nombres[i], valores[i]) for i in mayores]
+    debilidades = [(nombres[i], valores[i]) for i in menores]
+    
+    return fortalezas, debilidades
+
 # 3.5 Análisis comparativo
+def calcular_promedios_por_grupo(codigos, n_grupos, df_prep):
+    """
+    Calcula los promedios por dimensión de cada grupo en una sola pasada.
+    
+    Args:
+        codigos (ndarray): Código entero del grupo de cada fila (-1 = sin grupo)
+        n_grupos (int): Número de grupos
+        df_prep (DataFrame): DataFrame preparado con valores numéricos
+        
+    Returns:
+        dict: Diccionario {dimensión: array con el promedio de cada grupo}
+    """
+    promedios_fila, dimensiones = obtener_promedios_fila(df_prep)
+    
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    promedios_fila = promedios_fila[validos]
+    conteos = np.bincount(codigos, minlength=n_grupos)
+    
+    promedios = {}
+    
+    for indice, dimension in enumerate(dimensiones):
+        # Sumar los promedios por fila de la dimensión dentro de cada grupo
+        sumas = np.bincount(codigos, weights=promedios_fila[:, indice], minlength=n_grupos)
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            promedios[dimension] = sumas / conteos
+    
+    return promedios
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analisis_comparativo(df, df_prep):
     """
     Realiza un análisis comparativo por variables demográficas.
@@ -391,46 +746,30 @@ def analisis_comparativo(df, df_prep):
     resultados = {}
     
     # Comparación por comuna
-    if "COMUNA" in df.columns:
-        comparacion_comuna = {}
-        
-        # Recopilar valores únicos de comuna
-        comunas = df["COMUNA"].dropna().unique()
-        
-        for comuna in comunas:
-            # Filtrar datos de esta comuna
-            mask = df["COMUNA"] == comuna
-            df_comuna = df_prep[mask]
-            
-            # Calcular promedios por dimensión
-            promedios = {}
-            
-            for dimension, preguntas in DIMENSIONES.items():
-                pregs_existentes = [p for p in preguntas if p in df_prep.columns]
-                
-                if pregs_existentes:
-                    promedio = df_comuna[pregs_existentes].mean(axis=1).mean()
-                    promedios[dimension] = promedio
-            
-            comparacion_comuna[comuna] = promedios
+    if "COMUNA" in df_prep.columns:
+        # Codificar cada comuna como entero una sola vez (-1 = sin comuna);
+        # la columna ya es categórica, así que no se vuelven a comparar textos
+        codigos, comunas = pd.factorize(df_prep["COMUNA"])
         
         # Convertir a DataFrame
-        if comparacion_comuna:
-            df_comp = pd.DataFrame(comparacion_comuna).T
-            df_comp.index.name = "Comuna"
+        if len(comunas):
+            promedios = calcular_promedios_por_grupo(codigos, len(comunas), df_prep)
+            df_comp = pd.DataFrame(promedios, index=pd.Index(np.asarray(comunas), name="Comuna"))
             
             resultados["comparacion_comunas"] = df_comp
     
     return resultados
 
 # Función principal para ejecutar todos los análisis
-def ejecutar_analisis_completo(df_datos, n_clusters=3):
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def ejecutar_analisis_completo(df_datos, n_clusters=3, etapas=ETAPAS_ANALISIS):
     """
     Ejecuta el análisis completo del clima organizacional.
     
     Args:
         df_datos (DataFrame): DataFrame con los datos originales
         n_clusters (int): Número de clusters para el análisis
+        etapas (tuple): Etapas a ejecutar; las omitidas no aparecen en el resultado
         
     Returns:
         dict: Diccionario con todos los resultados de los análisis
@@ -442,37 +781,259 @@ def ejecutar_analisis_completo(df_datos, n_clusters=3):
     # Preparar datos
     df_prep = preparar_datos(df_datos)
     
-    # Ejecutar todos los análisis
-    resultados = {
-        "datos_originales": df_datos,
-        "datos_preparados": df_prep
-    }
+    # Ejecutar todos los análisis (solo se guardan los resultados derivados;
+    # los DataFrames de entrada no forman parte del resultado)
+    resultados = {}
     
     # 3.1 Análisis descriptivo básico
-    resultados["descriptivo"] = analisis_descriptivo(df_datos, df_prep)
+    if "descriptivo" in etapas:
+        resultados["descriptivo"] = analisis_descriptivo(df_datos, df_prep)
     
     # 3.2 Análisis por dimensiones
-    resultados["dimensiones"] = analisis_por_dimensiones(df_prep)
+    if "dimensiones" in etapas:
+        resultados["dimensiones"] = analisis_por_dimensiones(df_prep)
     
     
     # 3.4 Análisis de conglomerados
-    resultados["clusters"] = analisis_clusters(df_datos, df_prep, n_clusters)
+    if "clusters" in etapas:
+        resultados["clusters"] = analisis_clusters(df_datos, df_prep, n_clusters)
     
     # 3.5 Análisis comparativo
-    resultados["comparativo"] = analisis_comparativo(df_datos, df_prep)
+    if "comparativo" in etapas:
+        resultados["comparativo"] = analisis_comparativo(df_datos, df_prep)
     
     return resultados
 
+# Funciones que construyen cada figura (cacheadas por los datos que reciben)
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_distribucion_respuestas(dist):
+    """
+    Construye el gráfico circular de la distribución general de respuestas.
+    
+    Args:
+        dist (DataFrame): Distribución de respuestas
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_dist = px.pie(
+        dist,
+        names="Respuesta",
+        values="Cantidad",
+        title="Distribución General de Respuestas",
+        color="Respuesta",
+        color_discrete_map=COLORES_RESPUESTAS
+    )
+    
+    fig_dist.update_traces(textinfo="percent+label")
+    return fig_dist
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_distribucion_comunas(comunas):
+    """
+    Construye el gráfico de barras de comedores por comuna.
+    
+    Args:
+        comunas (DataFrame): Cantidad de comedores por comuna
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_comunas = px.bar(
+        comunas,
+        x="Comuna",
+        y="Cantidad",
+        title="Distribución de Comedores por Comuna",
+        color="Cantidad",
+        color_continuous_scale="Viridis"
+    )
+    
+    fig_comunas.update_layout(xaxis_title="Comuna", yaxis_title="Número de Comedores")
+    return fig_comunas
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_distribucion_nodos(nodos):
+    """
+    Construye el gráfico de barras de comedores por nodo.
+    
+    Args:
+        nodos (DataFrame): Cantidad de comedores por nodo
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_nodos = px.bar(
+        nodos,
+        x="Nodo",
+        y="Cantidad",
+        title="Distribución de Comedores por Nodo",
+        color="Cantidad",
+        color_continuous_scale="Blues", # Esquema de color azul
+        text_auto=True
+    )
+    
+    fig_nodos.update_layout(
+        xaxis_title="Nodo",
+        yaxis_title="Número de Comedores",
+        xaxis={'categoryorder':'total descending'}, # Ordenar barras
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    return fig_nodos
+
+@st.cache_resource(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_promedios_dimensiones(promedios, titulo="Puntuación Promedio por Dimensión"):
+    """
+    Construye el gráfico de barras de puntuación promedio por dimensión.
+    
+    Se guarda como recurso (una entrada por combinación de datos y título): la
+    instancia se reutiliza entre ejecuciones y no debe modificarse.
+    
+    Args:
+        promedios (DataFrame): Promedios e interpretación por dimensión
+        titulo (str, optional): Título del gráfico (None para omitirlo)
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_promedios = px.bar(
+        promedios,
+        x="Dimensión",
+        y="Promedio",
+        color="Interpretación",
+        title=titulo,
+        color_discrete_map=COLORES_INTERPRETACION,
+        text="Promedio"
+    )
+    
+    fig_promedios.update_traces(texttemplate="%{text:.2f}", textposition="outside")
+    fig_promedios.update_layout(
+        xaxis_title="Dimensión",
+        yaxis_title="Puntuación Promedio (1-3)",
+        yaxis=EJE_PROMEDIO,
+        legend_title="Interpretación"
+    )
+    
+    return fig_promedios
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_promedios_preguntas(promedio_preguntas, dimension):
+    """
+    Construye el gráfico de barras de los promedios de las preguntas de una dimensión.
+    
+    Args:
+        promedio_preguntas (dict): Promedio de cada pregunta (nombre de columna original)
+        dimension (str): Nombre de la dimensión
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    n_preguntas = len(promedio_preguntas)
+    df_promedio = pd.DataFrame({
+        # Usar nombre original para el gráfico, el eje x lo mostrará
+        "Pregunta": np.fromiter(promedio_preguntas.keys(), dtype=object, count=n_preguntas),
+        "Promedio": np.fromiter(promedio_preguntas.values(), dtype=np.float64, count=n_preguntas)
+    })
+    
+    # Crear nombres legibles para el eje x (truncados si son largos)
+    nombres = df_promedio["Pregunta"].str.replace("_", " ", regex=False).str.replace(".", ". ", n=1, regex=False)
+    nombres_legibles_eje = np.where(nombres.str.len() > 30, nombres.str.slice(0, 30) + "...", nombres)
+    
+    fig_prom_dim = px.bar(
+        df_promedio,
+        x="Pregunta", # Usar la columna original para datos
+        y="Promedio",
+        title=f"Promedios de Preguntas en {dimension}",
+        color="Promedio",
+        color_continuous_scale="YlGnBu", # Escala de color
+        text="Promedio"
+    )
+    
+    fig_prom_dim.update_traces(texttemplate="%{text:.2f}", textposition="outside")
+    fig_prom_dim.update_layout(
+        xaxis_title="Pregunta",
+        yaxis_title="Puntuación Promedio (1-3)",
+        yaxis=EJE_PROMEDIO,
+        xaxis=dict(
+            tickmode='array',
+            tickvals=df_promedio["Pregunta"], # Valores originales
+            ticktext=nombres_legibles_eje # Etiquetas legibles
+        )
+    )
+    
+    return fig_prom_dim
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_radar_dimensiones(promedios):
+    """
+    Construye el radar con el perfil de dimensiones del clima organizacional.
+    
+    Args:
+        promedios (DataFrame): Promedios e interpretación por dimensión
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_radar = go.Figure()
+    
+    fig_radar.add_trace(go.Scatterpolar(
+        r=promedios["Promedio"],
+        theta=promedios["Dimensión"],
+        fill="toself",
+        name="Promedio"
+    ))
+    
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 3]
+            )
+        ),
+        title="Perfil de Dimensiones del Clima Organizacional",
+        showlegend=False
+    )
+    
+    return fig_radar
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def figura_clusters_pca(pca_data, n_clusters):
+    """
+    Construye el diagrama de dispersión de los clusters sobre los componentes principales.
+    
+    Args:
+        pca_data (DataFrame): Componentes principales y cluster de cada comedor
+        n_clusters (int): Número de clusters
+        
+    Returns:
+        Figure: Figura de Plotly
+    """
+    fig_clusters = px.scatter(
+        pca_data,
+        x="PCA1",
+        y="PCA2",
+        color="Cluster",
+        hover_name="Comedor" if "Comedor" in pca_data.columns else None,
+        title=f"Clusters de Comedores (PCA, {n_clusters} grupos)",
+        color_discrete_sequence=px.colors.qualitative.Bold,
+        render_mode="webgl"
+    )
+    
+    fig_clusters.update_layout(height=600, legend_title="Cluster")
+    return fig_clusters
+
 # Función para generar visualizaciones con Plotly (modificada)
 def generar_visualizaciones(resultados):
     """
-    Genera visualizaciones interactivas a partir de los resultados de los análisis.
+    Prepara las visualizaciones interactivas a partir de los resultados de los análisis.
+    
+    Las figuras se construyen bajo demanda: cada entrada del diccionario es una
+    función sin argumentos que devuelve la figura cuando la página la muestra.
     
     Args:
         resultados (dict): Resultados de los análisis
         
     Returns:
-        dict: Diccionario con figuras de Plotly
+        dict: Diccionario con funciones que generan figuras de Plotly
     """
     figuras = {}
     
@@ -481,112 +1042,34 @@ def generar_visualizaciones(resultados):
     
     # Visualización 1: Distribución de respuestas
     if "descriptivo" in resultados and "distribucion_respuestas" in resultados["descriptivo"]:
-        dist = resultados["descriptivo"]["distribucion_respuestas"]
-        
-        fig_dist = px.pie(
-            dist,
-            names="Respuesta",
-            values="Cantidad",
-            title="Distribución General de Respuestas",
-            color="Respuesta",
-            color_discrete_map={
-                "DE ACUERDO": "#2ca02c",
-                "NI DEACUERDO, NI EN DESACUERDO": "#ffbb78",
-                "EN DESACUERDO": "#d62728"
-            }
+        figuras["distribucion_respuestas"] = partial(
+            figura_distribucion_respuestas, resultados["descriptivo"]["distribucion_respuestas"]
         )
-        
-        fig_dist.update_traces(textinfo="percent+label")
-        figuras["distribucion_respuestas"] = fig_dist
     
     # Visualización 2: Distribución por comuna
     if "descriptivo" in resultados and "distribucion_comunas" in resultados["descriptivo"]:
-        comunas = resultados["descriptivo"]["distribucion_comunas"]
-        
-        fig_comunas = px.bar(
-            comunas,
-            x="Comuna",
-            y="Cantidad",
-            title="Distribución de Comedores por Comuna",
-            color="Cantidad",
-            color_continuous_scale="Viridis"
-        )
-        
-        fig_comunas.update_layout(xaxis_title="Comuna", yaxis_title="Número de Comedores")
-        figuras["distribucion_comunas"] = fig_comunas
-    
-    # Visualización 3: Promedios por dimensión
-    if "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]:
-        promedios = resultados["dimensiones"]["promedios_dimensiones"]
-        
-        fig_promedios = px.bar(
-            promedios,
-            x="Dimensión",
-            y="Promedio",
-            color="Interpretación",
-            title="Puntuación Promedio por Dimensión",
-            color_discrete_map={
-                "Favorable": "#2ca02c",
-                "Neutral": "#ffbb78",
-                "Desfavorable": "#d62728"
-            },
-            text="Promedio"
+        figuras["distribucion_comunas"] = partial(
+            figura_distribucion_comunas, resultados["descriptivo"]["distribucion_comunas"]
         )
-        
-        fig_promedios.update_traces(texttemplate="%{text:.2f}", textposition="outside")
-        fig_promedios.update_layout(
-            xaxis_title="Dimensión",
-            yaxis_title="Puntuación Promedio (1-3)",
-            yaxis=dict(range=[0, 3.2])
-        )
-        
-        figuras["promedios_dimensiones"] = fig_promedios
     
-    # Visualización 4: Radar de dimensiones
+    # Visualizaciones 3 y 4: Promedios y radar de dimensiones
     if "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]:
         promedios = resultados["dimensiones"]["promedios_dimensiones"]
         
-        fig_radar = go.Figure()
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=promedios["Promedio"],
-            theta=promedios["Dimensión"],
-            fill="toself",
-            name="Promedio"
-        ))
-        
-        fig_radar.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 3]
-                )
-            ),
-            title="Perfil de Dimensiones del Clima Organizacional",
-            showlegend=False
-        )
-        
-        figuras["radar_dimensiones"] = fig_radar
+        figuras["promedios_dimensiones"] = partial(figura_promedios_dimensiones, promedios)
+        figuras["radar_dimensiones"] = partial(figura_radar_dimensiones, promedios)
     
-       # Visualización 6: Clusters en PCA
+    # Visualización 6: Clusters en PCA
     if "clusters" in resultados and "pca_data" in resultados["clusters"]:
-        pca_data = resultados["clusters"]["pca_data"]
-        n_clusters = resultados["clusters"]["n_clusters"]
-        
-        fig_clusters = px.scatter(
-            pca_data,
-            x="PCA1",
-            y="PCA2",
-            color="Cluster",
-            hover_name="Comedor" if "Comedor" in pca_data.columns else None,
-            title=f"Clusters de Comedores (PCA, {n_clusters} grupos)",
-            color_discrete_sequence=px.colors.qualitative.Bold
+        figuras["clusters_pca"] = partial(
+            figura_clusters_pca,
+            resultados["clusters"]["pca_data"],
+            resultados["clusters"]["n_clusters"]
         )
-        
-        fig_clusters.update_layout(height=600, legend_title="Cluster")
-        figuras["clusters_pca"] = fig_clusters
     
     return figuras
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analisis_liderazgo_por_rol(df_prep):
     """
     Realiza un análisis comparativo de percepción de liderazgo entre gestores principales y auxiliares.
@@ -616,20 +1099,30 @@ def analisis_liderazgo_por_rol(df_prep):
     df_con_rol = df_prep[df_prep["ROL"].notna()]
     
     # Normalizar los valores de rol para manejar posibles variaciones en el texto
-    df_con_rol["ROL_NORMALIZADO"] = df_con_rol["ROL"].str.strip().str.upper()
+    rol_normalizado = df_con_rol["ROL"].str.strip().str.upper()
     
     # Definir los roles a comparar
     rol_principal = "GESTORA/OR PRINCIPAL"
     rol_auxiliar = "GESTORA/OR  AUXILIAR"
     
-    # Identificar comedores que tienen ambos roles para comparar
-    comedores_principales = set(df_con_rol[df_con_rol["ROL_NORMALIZADO"].str.contains(rol_principal)]["NOMBRE_COMEDOR"])
-    comedores_auxiliares = set(df_con_rol[df_con_rol["ROL_NORMALIZADO"].str.contains(rol_auxiliar)]["NOMBRE_COMEDOR"])
-    comedores_ambos_roles = comedores_principales.intersection(comedores_auxiliares)
+    # Identificar una sola vez las filas de cada rol
+    mask_principal = rol_normalizado.str.contains(rol_principal, regex=False).to_numpy(dtype=bool)
+    mask_auxiliar = rol_normalizado.str.contains(rol_auxiliar, regex=False).to_numpy(dtype=bool)
+    
+    # Identificar comedores que tienen ambos roles para comparar: cada comedor
+    # recibe un código entero y se marca la presencia de cada rol
+    codigos_comedor, comedores = pd.factorize(df_con_rol["NOMBRE_COMEDOR"], use_na_sentinel=False)
     
-    resultados["total_comedores"] = len(set(df_con_rol["NOMBRE_COMEDOR"]))
-    resultados["comedores_con_principal"] = len(comedores_principales)
-    resultados["comedores_con_auxiliar"] = len(comedores_auxiliares)
+    tiene_principal = np.zeros(len(comedores), dtype=bool)
+    tiene_principal[codigos_comedor[mask_principal]] = True
+    tiene_auxiliar = np.zeros(len(comedores), dtype=bool)
+    tiene_auxiliar[codigos_comedor[mask_auxiliar]] = True
+    
+    comedores_ambos_roles = comedores[np.flatnonzero(tiene_principal & tiene_auxiliar)]
+    
+    resultados["total_comedores"] = len(comedores)
+    resultados["comedores_con_principal"] = int(tiene_principal.sum())
+    resultados["comedores_con_auxiliar"] = int(tiene_auxiliar.sum())
     resultados["comedores_con_ambos_roles"] = len(comedores_ambos_roles)
     
     # Análisis por pregunta de liderazgo
@@ -639,12 +1132,19 @@ def analisis_liderazgo_por_rol(df_prep):
         "2.3_ESPACIOS_ADECUADOS_RETROALIMENTACION"
     ]
     
-    # Análisis global (todos los comedores)
+    matriz_liderazgo = df_con_rol[preguntas_liderazgo].to_numpy()
+    
+    # Análisis global (todos los comedores): promedios por rol de las tres
+    # preguntas a la vez sobre la matriz de respuestas
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedios_globales_principal = matriz_liderazgo[mask_principal].sum(axis=0) / mask_principal.sum()
+        promedios_globales_auxiliar = matriz_liderazgo[mask_auxiliar].sum(axis=0) / mask_auxiliar.sum()
+    
     analisis_global = {}
-    for pregunta in preguntas_liderazgo:
+    for columna, pregunta in enumerate(preguntas_liderazgo):
         # Obtener promedios por rol
-        promedio_principal = df_con_rol[df_con_rol["ROL_NORMALIZADO"].str.contains(rol_principal)][pregunta].mean()
-        promedio_auxiliar = df_con_rol[df_con_rol["ROL_NORMALIZADO"].str.contains(rol_auxiliar)][pregunta].mean()
+        promedio_principal = promedios_globales_principal[columna]
+        promedio_auxiliar = promedios_globales_auxiliar[columna]
         
         # Calcular diferencia
         diferencia = promedio_principal - promedio_auxiliar
@@ -661,90 +1161,130 @@ def analisis_liderazgo_por_rol(df_prep):
     # Análisis por comedor (solo para comedores que tienen ambos roles)
     analisis_comedores = {}
     
-    for comedor in comedores_ambos_roles:
-        # Filtrar datos de este comedor
-        df_comedor = df_con_rol[df_con_rol["NOMBRE_COMEDOR"] == comedor]
-        
-        # Datos de gestores principales de este comedor
-        df_principal = df_comedor[df_comedor["ROL_NORMALIZADO"].str.contains(rol_principal)]
-        
-        # Datos de gestores auxiliares de este comedor
-        df_auxiliar = df_comedor[df_comedor["ROL_NORMALIZADO"].str.contains(rol_auxiliar)]
-        
+    # Valores y promedios de cada rol agrupados por comedor en una sola pasada
+    promedios_principal, valores_principal = agrupar_por_comedor(
+        codigos_comedor[mask_principal], matriz_liderazgo[mask_principal], len(comedores)
+    )
+    promedios_auxiliar, valores_auxiliar = agrupar_por_comedor(
+        codigos_comedor[mask_auxiliar], matriz_liderazgo[mask_auxiliar], len(comedores)
+    )
+    
+    # Diferencias y concordancia (qué tan similares son las respuestas) de
+    # todos los comedores y preguntas a la vez
+    indices_ambos = np.flatnonzero(tiene_principal & tiene_auxiliar)
+    diferencias = promedios_principal[indices_ambos] - promedios_auxiliar[indices_ambos]
+    diferencias_abs = np.abs(diferencias)
+    concordancias = clasificar_concordancia(diferencias_abs)
+    concordancias_globales = np.where(
+        (diferencias_abs <= 0.5).all(axis=1), "Alta",
+        np.where((diferencias_abs <= 1).all(axis=1), "Media", "Baja")
+    )
+    diferencias_promedio = diferencias_abs.mean(axis=1)
+    
+    for fila, (indice, comedor) in enumerate(zip(indices_ambos, comedores_ambos_roles)):
         # Análisis por pregunta para este comedor
         analisis_comedor = {}
         
-        for pregunta in preguntas_liderazgo:
-            # Obtener valores para cada rol (puede haber múltiples gestores por rol)
-            valores_principal = df_principal[pregunta].tolist()
-            valores_auxiliar = df_auxiliar[pregunta].tolist()
-            
-            # Calcular promedios
-            promedio_principal = df_principal[pregunta].mean()
-            promedio_auxiliar = df_auxiliar[pregunta].mean()
-            
-            # Calcular diferencia
-            diferencia = promedio_principal - promedio_auxiliar
-            
-            # Calcular concordancia (qué tan similares son las respuestas)
-            concordancia = "Alta" if abs(diferencia) <= 0.5 else "Media" if abs(diferencia) <= 1 else "Baja"
-            
+        for columna, pregunta in enumerate(preguntas_liderazgo):
             analisis_comedor[pregunta] = {
-                "valores_principal": valores_principal,
-                "valores_auxiliar": valores_auxiliar,
-                "promedio_principal": promedio_principal,
-                "promedio_auxiliar": promedio_auxiliar,
-                "diferencia": diferencia,
-                "diferencia_abs": abs(diferencia),
-                "concordancia": concordancia
+                "valores_principal": valores_principal[indice][:, columna].tolist(),
+                "valores_auxiliar": valores_auxiliar[indice][:, columna].tolist(),
+                "promedio_principal": promedios_principal[indice, columna],
+                "promedio_auxiliar": promedios_auxiliar[indice, columna],
+                "diferencia": diferencias[fila, columna],
+                "diferencia_abs": diferencias_abs[fila, columna],
+                "concordancia": str(concordancias[fila, columna])
             }
         
-        # Calcular indicadores globales para este comedor
-        diferencias = [analisis_comedor[pregunta]["diferencia_abs"] for pregunta in preguntas_liderazgo]
-        concordancia_global = "Alta" if all(d <= 0.5 for d in diferencias) else "Media" if all(d <= 1 for d in diferencias) else "Baja"
-        
         analisis_comedores[comedor] = {
             "analisis_preguntas": analisis_comedor,
-            "diferencia_promedio": sum(diferencias) / len(diferencias),
-            "concordancia_global": concordancia_global
+            "diferencia_promedio": diferencias_promedio[fila],
+            "concordancia_global": str(concordancias_globales[fila])
         }
     
     resultados["analisis_comedores"] = analisis_comedores
     
     # Crear resumen de concordancia
     resumen_concordancia = {
-        "Alta": 0,
-        "Media": 0,
-        "Baja": 0
+        nivel: int((concordancias_globales == nivel).sum())
+        for nivel in ["Alta", "Media", "Baja"]
     }
     
-    for comedor, analisis in analisis_comedores.items():
-        concordancia = analisis["concordancia_global"]
-        resumen_concordancia[concordancia] += 1
-    
     resultados["resumen_concordancia"] = resumen_concordancia
     
     return resultados
+
+def agrupar_por_comedor(codigos, valores, n_comedores):
+    """
+    Agrupa las respuestas por comedor calculando promedios y listas de valores.
+    
+    Args:
+        codigos (ndarray): Código entero del comedor de cada fila
+        valores (ndarray): Matriz (filas, preguntas) de respuestas numéricas
+        n_comedores (int): Número total de comedores
+        
+    Returns:
+        tuple: (matriz (n_comedores, preguntas) de promedios, lista con la
+               submatriz de respuestas de cada comedor)
+    """
+    conteos = np.bincount(codigos, minlength=n_comedores)
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedios = np.column_stack([
+            np.bincount(codigos, weights=valores[:, j], minlength=n_comedores) / conteos
+            for j in range(valores.shape[1])
+        ])
+    
+    # Ordenar las filas por comedor (manteniendo el orden original) y cortar por comedor
+    orden = np.argsort(codigos, kind="stable")
+    grupos = np.split(valores[orden], np.cumsum(conteos)[:-1])
+    
+    return promedios, grupos
+
+def clasificar_concordancia(diferencias_abs):
+    """
+    Clasifica la concordancia entre roles según la diferencia absoluta de promedios.
+    
+    Args:
+        diferencias_abs (ndarray): Diferencias absolutas entre promedios
+        
+    Returns:
+        ndarray: Niveles "Alta" (<= 0.5), "Media" (<= 1) o "Baja"
+    """
+    return np.where(diferencias_abs <= 0.5, "Alta", np.where(diferencias_abs <= 1, "Media", "Baja"))
+
 # Función para generar visualizaciones para el análisis de liderazgo por rol
-def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
+@st.cache_resource(show_spinner=False, hash_funcs=HASH_FUNCS)
+def generar_visualizaciones_liderazgo_por_rol(_resultados_liderazgo, df_prep):
     """
     Genera visualizaciones para el análisis de liderazgo por rol.
     
+    Se guarda como recurso indexado por df_prep: los resultados se derivan de forma
+    determinista de esos datos, así que no se recorren para calcular la clave. Por
+    eso df_prep es obligatorio. Las figuras se comparten entre ejecuciones y no
+    deben modificarse.
+    
     Args:
-        resultados_liderazgo (dict): Resultados del análisis de liderazgo por rol
+        _resultados_liderazgo (dict): Resultados del análisis de liderazgo por rol (no se usa como clave)
+        df_prep (DataFrame): DataFrame preparado del que se obtuvieron los resultados
         
     Returns:
         dict: Diccionario con figuras de Plotly
+        
+    Raises:
+        ValueError: Si no se recibe df_prep
     """
+    if df_prep is None:
+        raise ValueError("Se requiere df_prep para identificar las visualizaciones de liderazgo")
     
     figuras = {}
     
-    if "error" in resultados_liderazgo:
-        return {"error": resultados_liderazgo["error"]}
+    if "error" in _resultados_liderazgo:
+        return {"error": _resultados_liderazgo["error"]}
     
     # 1. Comparación global de promedios por pregunta y rol
-    if "analisis_global" in resultados_liderazgo:
-        analisis_global = resultados_liderazgo["analisis_global"]
+    if "analisis_global" in _resultados_liderazgo:
+        analisis_global = _resultados_liderazgo["analisis_global"]
         
         # Preparar datos para el gráfico
         preguntas = []
@@ -780,14 +1320,14 @@ def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
             color="Rol",
             barmode="group",
             title="Comparación de Percepción de Liderazgo por Rol",
-            color_discrete_map={"Principal": "#1f77b4", "Auxiliar": "#ff7f0e"},
+            color_discrete_map=COLORES_ROLES,
             text_auto=".2f"
         )
         
         fig_barras.update_layout(
             xaxis_title="Pregunta de Liderazgo",
             yaxis_title="Puntuación Promedio (1-3)",
-            yaxis=dict(range=[0, 3.2]),
+            yaxis=EJE_PROMEDIO,
             legend_title="Rol"
         )
         
@@ -817,8 +1357,8 @@ def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
         figuras["diferencias_global"] = fig_dif
     
     # 2. Distribución de concordancia entre comedores
-    if "resumen_concordancia" in resultados_liderazgo:
-        resumen = resultados_liderazgo["resumen_concordancia"]
+    if "resumen_concordancia" in _resultados_liderazgo:
+        resumen = _resultados_liderazgo["resumen_concordancia"]
         
         df_concordancia = pd.DataFrame({
             "Nivel de Concordancia": list(resumen.keys()),
@@ -832,19 +1372,13 @@ def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
         })
         df_concordancia = df_concordancia.sort_values("Orden")
         
-        colores_concordancia = {
-            "Alta": "#2ca02c",   # Verde
-            "Media": "#ffbb78",  # Naranja
-            "Baja": "#d62728"    # Rojo
-        }
-        
         fig_conc = px.pie(
             df_concordancia,
             names="Nivel de Concordancia",
             values="Cantidad de Comedores",
             title="Distribución de Concordancia entre Roles por Comedor",
             color="Nivel de Concordancia",
-            color_discrete_map=colores_concordancia
+            color_discrete_map=COLORES_CONCORDANCIA
         )
         
         fig_conc.update_traces(textinfo="percent+label+value")
@@ -852,20 +1386,18 @@ def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
         figuras["distribucion_concordancia"] = fig_conc
     
     # 3. Detalle por comedor (si hay más de 5 comedores, mostrar solo top 5 con mayor diferencia)
-    if "analisis_comedores" in resultados_liderazgo:
-        analisis_comedores = resultados_liderazgo["analisis_comedores"]
+    if "analisis_comedores" in _resultados_liderazgo:
+        analisis_comedores = _resultados_liderazgo["analisis_comedores"]
         
         if analisis_comedores:
-            # Ordenar comedores por diferencia promedio (de mayor a menor)
-            comedores_ordenados = sorted(
+            # Los 10 comedores con mayor diferencia promedio (de mayor a menor),
+            # sin ordenar la lista completa
+            top_comedores = heapq.nlargest(
+                10,
                 analisis_comedores.items(),
-                key=lambda x: x[1]["diferencia_promedio"],
-                reverse=True
+                key=lambda x: x[1]["diferencia_promedio"]
             )
             
-            # Limitar a 10 comedores para el gráfico
-            top_comedores = comedores_ordenados[:10]
-            
             # Datos para el gráfico
             nombres_comedores = []
             diferencias_promedio = []
@@ -880,7 +1412,8 @@ def generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo):
             })
             
             # Truncar nombres muy largos
-            df_top["Comedor"] = df_top["Comedor"].apply(lambda x: x[:25] + "..." if len(x) > 25 else x)
+            nombres = df_top["Comedor"]
+            df_top["Comedor"] = np.where(nombres.str.len() > 25, nombres.str.slice(0, 25) + "...", nombres)
             
             fig_top = px.bar(
                 df_top,
@@ -12,6 +12,8 @@ Versión: 1.4 (Añadido título principal y descarga HTML)
 import streamlit as st
 import traceback
 import os
+import importlib
+from bisect import bisect_right
 import pandas as pd # Importar pandas
 from datetime import datetime # Para la fecha en el nombre del archivo
 
@@ -28,15 +30,13 @@ from google_connection import load_data
 # Importar las funciones de análisis
 # Asegúrate de que estas funciones existan y sean importables
 try:
-    from analisis_dior import ejecutar_analisis_completo, generar_visualizaciones, analisis_liderazgo_por_rol, interpretar_promedio
+    from analisis_dior import ejecutar_analisis_completo, generar_visualizaciones, analisis_liderazgo_por_rol, preparar_datos, HASH_FUNCS
 except ImportError as e:
     st.error(f"Error al importar funciones de análisis: {e}. Asegúrate de que 'analisis_dior.py' esté en el mismo directorio.")
     st.stop() # Detener si las funciones de análisis no se pueden importar
 
-# Estilos CSS personalizados
-def cargar_estilos_css():
-    """Carga los estilos CSS globales para la aplicación."""
-    st.markdown("""
+# Estilos CSS personalizados (constante de módulo: se construye una sola vez)
+ESTILOS_CSS = """
     <style>
     /* Estilos existentes */
     .main-header {
@@ -57,31 +57,6 @@ def cargar_estilos_css():
         margin-bottom: 1rem;
         text-align: center;
     }
-    .metric-card {
-        background-color: #E0F2FE; /* Azul claro */
-        border-radius: 8px;
-        padding: 16px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        text-align: center;
-        margin-bottom: 10px;
-        height: 100px;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-        border: 1px solid #BFDBFE;
-    }
-    .metric-label {
-        font-size: 0.9em;
-        color: #4B5563;
-        margin-bottom: 5px;
-        font-weight: 500;
-    }
-    .metric-value {
-        font-size: 1.8em;
-        font-weight: bold;
-        color: #1E3A8A;
-        line-height: 1.2;
-    }
     /* Estilo para el botón de descarga */
     .stDownloadButton>button {
         width: 100%;
@@ -105,160 +80,304 @@ def cargar_estilos_css():
         border-radius: 5px;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Páginas disponibles: nombre en la navegación -> (módulo, función que la muestra)
+PAGINAS = {
+    "Vista General": ("pages.vista_general", "mostrar_vista_general"),
+    "Análisis por Dimensiones": ("pages.dimensiones", "mostrar_dimensiones"),
+    "Liderazgo": ("pages.liderazgo", "mostrar_liderazgo"),
+    "Desempeño de Usuarios": ("pages.desempeno_usuarios", "mostrar_desempeno_usuarios"),
+}
+
+# Etapas del análisis que consultan las páginas y el reporte (la página
+# independiente de clusters los calcula con su propio número de clusters)
+ETAPAS_APP = ("descriptivo", "dimensiones")
+
+def obtener_pagina(nombre):
+    """
+    Obtiene la función que muestra una página (el módulo se importa solo la
+    primera vez; después se reutiliza desde sys.modules).
+
+    Args:
+        nombre: Nombre de la página en la navegación
+
+    Returns:
+        function: Función que muestra la página
+    """
+    modulo, funcion = PAGINAS[nombre]
+    return getattr(importlib.import_module(modulo), funcion)
+
+# Título y descripción de la página principal
+TITULO_PRINCIPAL = '<div class="main-header">Análisis de Clima Organizacional en Comedores Comunitarios</div>'
+DESCRIPCION_PRINCIPAL = """
+    <div class="main-description">
+    Análisis del clima organizacional en los comedores comunitarios,
+    basado en la percepción de las gestoras y gestores sobre el relacionamiento, trabajo en equipo,
+    liderazgos y sentido de pertenencia. Utilice las pestañas para navegar entre las diferentes secciones del análisis y la barra lateral para descargar un resumen.
+    </div>
+    """
+
+def cargar_estilos_css():
+    """
+    Carga los estilos CSS globales para la aplicación.
+
+    Se emiten en cada ejecución porque Streamlit elimina los elementos que no se
+    vuelven a dibujar; solo el texto del CSS se reutiliza.
+    """
+    st.markdown(ESTILOS_CSS, unsafe_allow_html=True)
 
 # --- Función para Generar Reporte HTML ---
-def generar_reporte_html(resultados, resultados_liderazgo):
+# Encabezado del reporte HTML (estilos y título); es constante, se arma una sola vez
+ENCABEZADO_REPORTE = "\n".join([
+    "<!DOCTYPE html>",
+    '<html lang="es">',
+    "<head>",
+    '  <meta charset="UTF-8">',
+    "  <title>Resumen Análisis DIOR</title>",
+    "  <style>",
+    "    body { font-family: sans-serif; line-height: 1.6; padding: 25px; color: #333; }",
+    "    h1, h2, h3 { color: #1E3A8A; border-bottom: 1px solid #ccc; padding-bottom: 5px; }",
+    "    h1 { font-size: 1.8em; }",
+    "    h2 { font-size: 1.5em; margin-top: 30px; }",
+    "    h3 { font-size: 1.2em; margin-top: 20px; }",
+    "    table { border-collapse: collapse; width: 90%; margin: 15px auto; }",
+    "    th, td { border: 1px solid #ddd; padding: 10px; text-align: left; }",
+    "    th { background-color: #E0F2FE; color: #1E3A8A; font-weight: bold; }",
+    "    .section { margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px dashed #eee; }", # Separador entre secciones
+    "    .metric-summary p, .summary-text p, .dimension-summary p, .liderazgo-summary p { margin: 8px 0; }",
+    "    ul { padding-left: 20px; }",
+    "    li { margin-bottom: 5px; }",
+    "    .warning { color: #D97706; font-weight: bold; }",
+    "    .success { color: #15803D; font-weight: bold; }",
+    "    .interpretation-favorable { color: #15803D; }",
+    "    .interpretation-neutral { color: #D97706; }",
+    "    .interpretation-desfavorable { color: #B91C1C; }",
+    "    .timestamp { font-size: 0.8em; color: #888; text-align: right; margin-top: 40px; }",
+    "  </style>",
+    "</head>",
+    "<body>",
+    "<h1>Resumen Análisis Clima Organizacional DIOR</h1>"
+])
+
+# Umbrales (% de respuestas) del clima general y la interpretación de cada tramo
+UMBRALES_CLIMA = [40, 60]
+NIVELES_CLIMA_FAVORABLE = ["mixto/neutral", "favorable", "muy favorable"]
+NIVELES_CLIMA_DESFAVORABLE = ["mixto/neutral", "desfavorable", "muy desfavorable"]
+
+# Clase CSS del reporte para cada interpretación
+CLASES_INTERPRETACION = {
+    "Favorable": "interpretation-favorable",
+    "Neutral": "interpretation-neutral",
+    "Desfavorable": "interpretation-desfavorable"
+}
+
+def contar_filas(resultados, clave):
     """
-    Genera una cadena HTML con el resumen de los análisis.
+    Cuenta las filas de una tabla de resultados.
 
     Args:
-        resultados: Diccionario con los resultados del análisis principal.
-        resultados_liderazgo: Diccionario con los resultados del análisis de liderazgo.
+        resultados: Diccionario de resultados.
+        clave: Clave de la tabla dentro del diccionario.
 
     Returns:
-        str: Cadena de texto con el contenido HTML del reporte.
+        int o str: Número de filas, o "N/A" si la tabla no existe o no es un DataFrame.
     """
-    # Inicializar lista para partes HTML
-    html_parts = [
-        "<!DOCTYPE html>",
-        '<html lang="es">',
-        "<head>",
-        '  <meta charset="UTF-8">',
-        "  <title>Resumen Análisis DIOR</title>",
-        "  <style>",
-        "    body { font-family: sans-serif; line-height: 1.6; padding: 25px; color: #333; }",
-        "    h1, h2, h3 { color: #1E3A8A; border-bottom: 1px solid #ccc; padding-bottom: 5px; }",
-        "    h1 { font-size: 1.8em; }",
-        "    h2 { font-size: 1.5em; margin-top: 30px; }",
-        "    h3 { font-size: 1.2em; margin-top: 20px; }",
-        "    table { border-collapse: collapse; width: 90%; margin: 15px auto; }",
-        "    th, td { border: 1px solid #ddd; padding: 10px; text-align: left; }",
-        "    th { background-color: #E0F2FE; color: #1E3A8A; font-weight: bold; }",
-        "    .section { margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px dashed #eee; }", # Separador entre secciones
-        "    .metric-summary p, .summary-text p, .dimension-summary p, .liderazgo-summary p { margin: 8px 0; }",
-        "    ul { padding-left: 20px; }",
-        "    li { margin-bottom: 5px; }",
-        "    .warning { color: #D97706; font-weight: bold; }",
-        "    .success { color: #15803D; font-weight: bold; }",
-        "    .interpretation-favorable { color: #15803D; }",
-        "    .interpretation-neutral { color: #D97706; }",
-        "    .interpretation-desfavorable { color: #B91C1C; }",
-        "    .timestamp { font-size: 0.8em; color: #888; text-align: right; margin-top: 40px; }",
-        "  </style>",
-        "</head>",
-        "<body>",
-        f"<h1>Resumen Análisis Clima Organizacional DIOR</h1>"
-        # Timestamp se mueve al final
-    ]
+    tabla = resultados.get(clave)
+    return len(tabla) if isinstance(tabla, pd.DataFrame) else "N/A"
 
-    # --- Sección 1: Vista General ---
-    html_parts.append('<div class="section"><h2>Vista General</h2>')
-    if resultados and "descriptivo" in resultados:
-        desc = resultados["descriptivo"]
-        html_parts.append('<div class="metric-summary"><h3>Métricas Principales</h3>')
-        html_parts.append(f"<p><b>Total Comedores Analizados:</b> {desc.get('total_comedores', 'N/A')}</p>")
-        total_comunas = len(desc.get("distribucion_comunas", pd.DataFrame())) if isinstance(desc.get("distribucion_comunas"), pd.DataFrame) else "N/A"
-        total_nodos = len(desc.get("distribucion_nodos", pd.DataFrame())) if isinstance(desc.get("distribucion_nodos"), pd.DataFrame) else "N/A"
-        total_nichos = len(desc.get("distribucion_nichos", pd.DataFrame())) if isinstance(desc.get("distribucion_nichos"), pd.DataFrame) else "N/A"
-        html_parts.append(f"<p><b>Total Comunas:</b> {total_comunas}</p>")
-        html_parts.append(f"<p><b>Total Nodos:</b> {total_nodos}</p>")
-        html_parts.append(f"<p><b>Total Nichos:</b> {total_nichos}</p>")
-        html_parts.append('</div>')
-
-        dist_resp_data = desc.get("distribucion_respuestas")
-        if isinstance(dist_resp_data, pd.DataFrame) and not dist_resp_data.empty:
-            dist_resp = dist_resp_data
-            respuesta_max = dist_resp.loc[dist_resp["Cantidad"].idxmax()]
-            total_respuestas = dist_resp["Cantidad"].sum()
-            de_acuerdo = dist_resp[dist_resp["Respuesta"] == "DE ACUERDO"]["Porcentaje"].iloc[0] if "DE ACUERDO" in dist_resp["Respuesta"].values else 0
-            desacuerdo = dist_resp[dist_resp["Respuesta"] == "EN DESACUERDO"]["Porcentaje"].iloc[0] if "EN DESACUERDO" in dist_resp["Respuesta"].values else 0
-
-            if de_acuerdo >= 60: interpretacion = "muy favorable"
-            elif de_acuerdo >= 40: interpretacion = "favorable"
-            elif desacuerdo >= 60: interpretacion = "muy desfavorable"
-            elif desacuerdo >= 40: interpretacion = "desfavorable"
-            else: interpretacion = "mixto/neutral"
-
-            html_parts.append('<div class="summary-text"><h3>Distribución General de Respuestas</h3>')
-            html_parts.append(f"<p>Se analizaron <b>{total_respuestas}</b> respuestas. La más frecuente fue <b>'{respuesta_max['Respuesta']}'</b> ({respuesta_max['Porcentaje']}%).</p>")
-            html_parts.append(f"<p>Interpretación General del Clima: <b>{interpretacion.upper()}</b>.</p>")
-            html_parts.append('</div>')
+def generar_html_vista_general(resultados):
+    """
+    Genera la sección de vista general del reporte HTML.
+
+    Args:
+        resultados: Diccionario con los resultados del análisis principal.
+
+    Returns:
+        str: Fragmento HTML de la sección.
+    """
+    if not (resultados and "descriptivo" in resultados):
+        contenido = "<p>Datos descriptivos no disponibles.</p>"
+        return f'<div class="section"><h2>Vista General</h2>\n{contenido}\n</div>'
+
+    desc = resultados["descriptivo"]
+    total_comunas = contar_filas(desc, "distribucion_comunas")
+    total_nodos = contar_filas(desc, "distribucion_nodos")
+    total_nichos = contar_filas(desc, "distribucion_nichos")
+    metricas = "\n".join([
+        '<div class="metric-summary"><h3>Métricas Principales</h3>',
+        f"<p><b>Total Comedores Analizados:</b> {desc.get('total_comedores', 'N/A')}</p>",
+        f"<p><b>Total Comunas:</b> {total_comunas}</p>",
+        f"<p><b>Total Nodos:</b> {total_nodos}</p>",
+        f"<p><b>Total Nichos:</b> {total_nichos}</p>",
+        '</div>'
+    ])
+
+    dist_resp = desc.get("distribucion_respuestas")
+    if isinstance(dist_resp, pd.DataFrame) and not dist_resp.empty:
+        respuesta_max = dist_resp.iloc[dist_resp["Cantidad"].to_numpy().argmax()]
+        total_respuestas = dist_resp["Cantidad"].sum()
+        porcentaje_por_respuesta = dict(zip(dist_resp["Respuesta"], dist_resp["Porcentaje"]))
+        de_acuerdo = porcentaje_por_respuesta.get("DE ACUERDO", 0)
+        desacuerdo = porcentaje_por_respuesta.get("EN DESACUERDO", 0)
+
+        # El tramo favorable tiene prioridad; si no se alcanza, se evalúa el desfavorable
+        tramo_favorable = bisect_right(UMBRALES_CLIMA, de_acuerdo)
+        if tramo_favorable:
+            interpretacion = NIVELES_CLIMA_FAVORABLE[tramo_favorable]
         else:
-             html_parts.append("<p>Distribución de respuestas no disponible.</p>")
+            interpretacion = NIVELES_CLIMA_DESFAVORABLE[bisect_right(UMBRALES_CLIMA, desacuerdo)]
+
+        distribucion = "\n".join([
+            '<div class="summary-text"><h3>Distribución General de Respuestas</h3>',
+            f"<p>Se analizaron <b>{total_respuestas}</b> respuestas. La más frecuente fue <b>'{respuesta_max['Respuesta']}'</b> ({respuesta_max['Porcentaje']}%).</p>",
+            f"<p>Interpretación General del Clima: <b>{interpretacion.upper()}</b>.</p>",
+            '</div>'
+        ])
     else:
-        html_parts.append("<p>Datos descriptivos no disponibles.</p>")
-    html_parts.append('</div>') # Fin sección Vista General
-
-    # --- Sección 2: Análisis por Dimensiones ---
-    html_parts.append('<div class="section"><h2>Análisis por Dimensiones</h2>')
-    if resultados and "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]:
-        prom_dim_data = resultados["dimensiones"]["promedios_dimensiones"]
-        if isinstance(prom_dim_data, pd.DataFrame) and not prom_dim_data.empty:
-            prom_dim = prom_dim_data
-            html_parts.append('<h3>Puntuación Promedio por Dimensión</h3>')
-            def get_interpretation_class(interp):
-                if interp == "Favorable": return "interpretation-favorable"
-                if interp == "Neutral": return "interpretation-neutral"
-                if interp == "Desfavorable": return "interpretation-desfavorable"
-                return ""
-
-            prom_dim_html = prom_dim.copy()
-            prom_dim_html['Promedio'] = prom_dim_html['Promedio'].map('{:.2f}'.format)
-            prom_dim_html['Interpretación'] = prom_dim_html.apply(lambda row: f'<span class="{get_interpretation_class(row["Interpretación"])}">{row["Interpretación"]}</span>', axis=1)
-            html_parts.append(prom_dim_html[['Dimensión', 'Promedio', 'Interpretación']].to_html(escape=False, index=False, classes='dataframe')) # Añadir clase
-
-            mejor_dim = prom_dim.iloc[0]
-            peor_dim = prom_dim.iloc[-1]
-            html_parts.append('<div class="dimension-summary"><h3>Resumen Dimensiones</h3>')
-            html_parts.append(f"<p><b>Dimensión mejor evaluada:</b> {mejor_dim['Dimensión']} (Promedio: {mejor_dim['Promedio']:.2f} - {mejor_dim['Interpretación']})</p>")
-            html_parts.append(f"<p><b>Dimensión peor evaluada:</b> {peor_dim['Dimensión']} (Promedio: {peor_dim['Promedio']:.2f} - {peor_dim['Interpretación']})</p>")
-            html_parts.append('</div>')
-        else:
-            html_parts.append("<p>Promedios por dimensión no disponibles.</p>")
+        distribucion = "<p>Distribución de respuestas no disponible.</p>"
+
+    return f'<div class="section"><h2>Vista General</h2>\n{metricas}\n{distribucion}\n</div>'
+
+def generar_html_dimensiones(resultados):
+    """
+    Genera la sección de análisis por dimensiones del reporte HTML.
+
+    Args:
+        resultados: Diccionario con los resultados del análisis principal.
+
+    Returns:
+        str: Fragmento HTML de la sección.
+    """
+    if not (resultados and "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]):
+        contenido = "<p>Análisis por dimensiones no disponible.</p>"
+    elif not isinstance(resultados["dimensiones"]["promedios_dimensiones"], pd.DataFrame) or resultados["dimensiones"]["promedios_dimensiones"].empty:
+        contenido = "<p>Promedios por dimensión no disponibles.</p>"
     else:
-        html_parts.append("<p>Análisis por dimensiones no disponible.</p>")
-    html_parts.append('</div>') # Fin sección Dimensiones
+        prom_dim = resultados["dimensiones"]["promedios_dimensiones"]
+
+        prom_dim_html = prom_dim.copy()
+        prom_dim_html['Promedio'] = prom_dim_html['Promedio'].map('{:.2f}'.format)
+        interpretacion = prom_dim_html['Interpretación']
+        prom_dim_html['Interpretación'] = '<span class="' + interpretacion.map(CLASES_INTERPRETACION).fillna('') + '">' + interpretacion + '</span>'
+
+        # Mejor y peor dimensión por valor, sin depender del orden de la tabla
+        promedios = prom_dim["Promedio"].to_numpy()
+        mejor_dim = prom_dim.iloc[promedios.argmax()]
+        peor_dim = prom_dim.iloc[promedios.argmin()]
+        contenido = "\n".join([
+            '<h3>Puntuación Promedio por Dimensión</h3>',
+            prom_dim_html[['Dimensión', 'Promedio', 'Interpretación']].to_html(escape=False, index=False, border=0, classes='dataframe'), # Añadir clase
+            '<div class="dimension-summary"><h3>Resumen Dimensiones</h3>',
+            f"<p><b>Dimensión mejor evaluada:</b> {mejor_dim['Dimensión']} (Promedio: {mejor_dim['Promedio']:.2f} - {mejor_dim['Interpretación']})</p>",
+            f"<p><b>Dimensión peor evaluada:</b> {peor_dim['Dimensión']} (Promedio: {peor_dim['Promedio']:.2f} - {peor_dim['Interpretación']})</p>",
+            '</div>'
+        ])
+
+    return f'<div class="section"><h2>Análisis por Dimensiones</h2>\n{contenido}\n</div>'
+
+def generar_html_liderazgo(resultados_liderazgo):
+    """
+    Genera la sección de análisis de liderazgo del reporte HTML.
+
+    Args:
+        resultados_liderazgo: Diccionario con los resultados del análisis de liderazgo.
 
-    # --- Sección 3: Liderazgo ---
-    html_parts.append('<div class="section"><h2>Análisis de Liderazgo (Comparación por Rol)</h2>')
-    if resultados_liderazgo and "error" not in resultados_liderazgo:
+    Returns:
+        str: Fragmento HTML de la sección.
+    """
+    if not (resultados_liderazgo and "error" not in resultados_liderazgo):
+        contenido = "<p>Análisis de liderazgo no disponible o con errores.</p>"
+    else:
         resumen_conc = resultados_liderazgo.get("resumen_concordancia", {})
-        comedores_ambos_roles = sum(resumen_conc.values())
+        alta = resumen_conc.get("Alta", 0)
+        media = resumen_conc.get("Media", 0)
+        baja = resumen_conc.get("Baja", 0)
+        comedores_ambos_roles = alta + media + baja
 
-        html_parts.append('<div class="liderazgo-summary"><h3>Concordancia entre Roles</h3>')
         if comedores_ambos_roles > 0:
-            html_parts.append(f"<p>Análisis sobre <b>{comedores_ambos_roles}</b> comedores con ambos roles registrados.</p>")
-            html_parts.append("<ul>")
-            html_parts.append(f"<li><b>Alta Concordancia:</b> {resumen_conc.get('Alta', 0)} comedores</li>")
-            html_parts.append(f"<li><b>Media Concordancia:</b> {resumen_conc.get('Media', 0)} comedores</li>")
-            html_parts.append(f"<li><b>Baja Concordancia:</b> {resumen_conc.get('Baja', 0)} comedores</li>")
-            html_parts.append("</ul>")
-
-            comedores_baja_concordancia = [
+            comedores_baja_concordancia = sorted(
                 comedor for comedor, datos in resultados_liderazgo.get("analisis_comedores", {}).items()
                 if datos.get("concordancia_global") == "Baja"
-            ]
+            )
             if comedores_baja_concordancia:
-                html_parts.append("<p class='warning'>⚠️ Comedores con Baja Concordancia (Potencial Intervención):</p><ul>")
-                for comedor in sorted(comedores_baja_concordancia):
-                    html_parts.append(f"<li>{comedor}</li>")
-                html_parts.append("</ul>")
+                lista_baja = "\n".join(
+                    ["<p class='warning'>⚠️ Comedores con Baja Concordancia (Potencial Intervención):</p><ul>"]
+                    + [f"<li>{comedor}</li>" for comedor in comedores_baja_concordancia]
+                    + ["</ul>"]
+                )
             else:
-                html_parts.append("<p class='success'>✅ No se encontraron comedores con baja concordancia general entre roles.</p>")
+                lista_baja = "<p class='success'>✅ No se encontraron comedores con baja concordancia general entre roles.</p>"
+
+            detalle = "\n".join([
+                f"<p>Análisis sobre <b>{comedores_ambos_roles}</b> comedores con ambos roles registrados.</p>",
+                "<ul>",
+                f"<li><b>Alta Concordancia:</b> {alta} comedores</li>",
+                f"<li><b>Media Concordancia:</b> {media} comedores</li>",
+                f"<li><b>Baja Concordancia:</b> {baja} comedores</li>",
+                "</ul>",
+                lista_baja
+            ])
         else:
-            html_parts.append("<p>No hay suficientes datos (comedores con ambos roles) para calcular la concordancia.</p>")
-        html_parts.append('</div>')
-    else:
-        html_parts.append("<p>Análisis de liderazgo no disponible o con errores.</p>")
-    html_parts.append('</div>') # Fin sección Liderazgo
+            detalle = "<p>No hay suficientes datos (comedores con ambos roles) para calcular la concordancia.</p>"
+
+        contenido = f'<div class="liderazgo-summary"><h3>Concordancia entre Roles</h3>\n{detalle}\n</div>'
+
+    return f'<div class="section"><h2>Análisis de Liderazgo (Comparación por Rol)</h2>\n{contenido}\n</div>'
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
+def generar_cuerpo_reporte_html(_resultados, _resultados_liderazgo, df_datos):
+    """
+    Genera las secciones HTML del reporte a partir de los análisis.
+
+    Las secciones del reporte (vista general, dimensiones y liderazgo) se derivan
+    de forma determinista de los datos, así que la caché se indexa solo por df_datos
+    y no recorre los resultados. La clave sigue siendo válida aunque cambien las
+    etapas de ETAPAS_APP, porque el reporte solo usa secciones que dependen de los datos.
+
+    Args:
+        _resultados: Diccionario con los resultados del análisis principal (no se usa como clave).
+        _resultados_liderazgo: Diccionario con los resultados del análisis de liderazgo (no se usa como clave).
+        df_datos: DataFrame original del que se obtuvieron los resultados
+
+    Returns:
+        str: Cadena de texto con el cuerpo HTML del reporte.
+    """
+    # Una cadena por sección, unidas una sola vez
+    secciones = [
+        ENCABEZADO_REPORTE,
+        generar_html_vista_general(_resultados),
+        generar_html_dimensiones(_resultados),
+        generar_html_liderazgo(_resultados_liderazgo)
+    ]
 
-    # Añadir timestamp al final
-    html_parts.append(f"<p class='timestamp'>Generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>")
-    # Cerrar HTML
-    html_parts.append("</body></html>")
+    return "\n".join(secciones)
 
-    return "\n".join(html_parts)
+def generar_reporte_html(resultados, resultados_liderazgo, df_datos, *, timestamp):
+    """
+    Genera una cadena HTML con el resumen de los análisis.
+
+    El botón de descarga necesita el HTML en cada ejecución: el cuerpo se reutiliza
+    desde la caché y solo se añade el timestamp.
+
+    Args:
+        resultados: Diccionario con los resultados del análisis principal.
+        resultados_liderazgo: Diccionario con los resultados del análisis de liderazgo.
+        df_datos: DataFrame original del que se obtuvieron los resultados
+        timestamp: Fecha y hora de generación ya formateada
+
+    Returns:
+        str: Cadena de texto con el contenido HTML del reporte.
+    """
+    secciones = [
+        generar_cuerpo_reporte_html(resultados, resultados_liderazgo, df_datos),
+        # Timestamp al final
+        f"<p class='timestamp'>Generado el: {timestamp}</p>",
+        # Cerrar HTML
+        "</body></html>"
+    ]
+
+    return "\n".join(secciones)
 
 
 # --- Función Principal de la App ---
@@ -268,16 +387,7 @@ def main():
 
     # --- Barra Lateral ---
     st.sidebar.markdown('<div class="sidebar-title">DIOR Analytics</div>', unsafe_allow_html=True)
-    page = st.sidebar.radio(
-        "Navegar",
-        ["Vista General", "Análisis por Dimensiones", "Liderazgo", "Desempeño de Usuarios"],
-        key="page_selection"
-    )
     st.sidebar.markdown('## Configuración')
-    n_clusters = st.sidebar.slider(
-        "Número de clusters (Análisis Backend)", min_value=2, max_value=5, value=3,
-        help="Selecciona el número de grupos para el análisis de clusters (usado en el backend)"
-    )
     show_details = st.sidebar.checkbox(
         "Mostrar detalles avanzados", value=True,
         help="Activa esta opción para ver análisis más detallados"
@@ -287,58 +397,46 @@ def main():
     # --- Área Principal ---
 
     # Título principal y Descripción (AÑADIDO)
-    st.markdown('<div class="main-header">Análisis de Clima Organizacional en Comedores Comunitarios</div>', unsafe_allow_html=True)
-    st.markdown("""
-    <div class="main-description">
-    Análisis del clima organizacional en los comedores comunitarios,
-    basado en la percepción de las gestoras y gestores sobre el relacionamiento, trabajo en equipo,
-    liderazgos y sentido de pertenencia. Utilice la barra lateral para navegar entre las diferentes secciones del análisis y descargar un resumen.
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(TITULO_PRINCIPAL, unsafe_allow_html=True)
+    st.markdown(DESCRIPCION_PRINCIPAL, unsafe_allow_html=True)
     st.markdown("---") # Separador
 
     # --- Variables para resultados ---
     df = None
+    df_prep = None
     resultados = None
     figuras = None
     resultados_liderazgo = None
 
     try:
         # --- Carga de Datos ---
-        if "df" not in st.session_state:
-            with st.spinner("Cargando datos de Google Sheets..."):
-                df = load_data()
-                if df is None or df.empty:
-                    st.error("No se pudieron cargar datos. Verifique la conexión.")
-                    st.stop()
-                else:
-                    st.session_state["df"] = df
-        else:
-            df = st.session_state["df"]
+        # load_data está cacheada con st.cache_data (compartida entre sesiones y
+        # renovada al vencer su TTL), así que se llama en cada ejecución
+        with st.spinner("Cargando datos de Google Sheets..."):
+            df = load_data()
+        if df is None or df.empty:
+            st.error("No se pudieron cargar datos. Verifique la conexión.")
+            st.stop()
+        st.session_state["df"] = df
+
+        # Datos preparados para las páginas que consultan respuestas por fila (cacheados)
+        df_prep = preparar_datos(df)
+        st.session_state["df_prep"] = df_prep
 
         # --- Ejecución de Análisis ---
-        cache_key = f"resultados_{n_clusters}"
-        if cache_key not in st.session_state:
-            with st.spinner("Analizando datos... Por favor espera."):
-                resultados = ejecutar_analisis_completo(df_datos=df, n_clusters=n_clusters)
-                figuras = generar_visualizaciones(resultados)
-                st.session_state[cache_key] = (resultados, figuras)
-        else:
-            resultados, figuras = st.session_state[cache_key]
-
-        # --- Pre-cálculo de Análisis de Liderazgo ---
-        if resultados and "datos_preparados" in resultados:
+        # El análisis está cacheado por contenido de los datos (las etapas de la app
+        # no incluyen los clusters, así que no se elige un número de clusters)
+        with st.spinner("Analizando datos... Por favor espera."):
+            resultados = ejecutar_analisis_completo(df_datos=df, etapas=ETAPAS_APP)
+            figuras = generar_visualizaciones(resultados)
+
+        # --- Pre-cálculo de Análisis de Liderazgo (cacheado por df_prep) ---
+        if resultados and "error" not in resultados:
              try:
-                 if "resultados_liderazgo_actuales" not in st.session_state: # Calcular solo si no existe
-                     resultados_liderazgo = analisis_liderazgo_por_rol(resultados["datos_preparados"])
-                     st.session_state["resultados_liderazgo_actuales"] = resultados_liderazgo
-                 else:
-                     resultados_liderazgo = st.session_state["resultados_liderazgo_actuales"]
+                 resultados_liderazgo = analisis_liderazgo_por_rol(df_prep)
              except Exception as e_lider:
                  print(f"Advertencia: No se pudo pre-calcular análisis de liderazgo: {e_lider}")
                  resultados_liderazgo = {"error": str(e_lider)}
-                 if "resultados_liderazgo_actuales" in st.session_state:
-                     del st.session_state["resultados_liderazgo_actuales"]
         else:
              resultados_liderazgo = {"error": "Datos preparados no disponibles."}
 
@@ -350,9 +448,13 @@ def main():
         st.sidebar.markdown('## Descargar Reporte')
         # Verificar que ambos resultados necesarios estén disponibles y sin errores
         if resultados and resultados_liderazgo and "error" not in resultados_liderazgo:
-            reporte_html_content = generar_reporte_html(resultados, resultados_liderazgo)
-            fecha_actual = datetime.now().strftime("%Y%m%d")
-            nombre_archivo = f"resumen_analisis_dior_{fecha_actual}.html"
+            # Una sola lectura del reloj para el timestamp y el nombre del archivo
+            fecha_actual = datetime.now()
+            reporte_html_content = generar_reporte_html(
+                resultados, resultados_liderazgo, df,
+                timestamp=fecha_actual.strftime("%Y-%m-%d %H:%M:%S")
+            )
+            nombre_archivo = f"resumen_analisis_dior_{fecha_actual.strftime('%Y%m%d')}.html"
             st.sidebar.download_button(
                 label="Descargar Resumen (HTML)",
                 data=reporte_html_content,
@@ -362,20 +464,18 @@ def main():
         else:
             st.sidebar.info("Análisis necesarios incompletos para generar el reporte.")
 
-        # --- Renderizar Página Seleccionada ---
-        # El contenido de la página se mostrará DEBAJO del título y descripción principal
-        if page == "Vista General":
-            from pages.vista_general import mostrar_vista_general
-            mostrar_vista_general(resultados, figuras, show_details)
-        elif page == "Análisis por Dimensiones":
-            from pages.dimensiones import mostrar_dimensiones
-            mostrar_dimensiones(resultados, figuras)
-        elif page == "Liderazgo":
-            from pages.liderazgo import mostrar_liderazgo
-            mostrar_liderazgo(resultados, df)
-        elif page == "Desempeño de Usuarios":
-            from pages.desempeno_usuarios import mostrar_desempeno_usuarios
-            mostrar_desempeno_usuarios(df)
+        # --- Renderizar Páginas en Pestañas ---
+        # El contenido de las páginas se mostrará DEBAJO del título y descripción principal.
+        # Las pestañas se envían juntas y se cambian en el navegador sin volver a ejecutar el script
+        argumentos_pagina = {
+            "Vista General": (resultados, figuras, show_details),
+            "Análisis por Dimensiones": (resultados, figuras, df_prep),
+            "Liderazgo": (resultados, df_prep, resultados_liderazgo),
+            "Desempeño de Usuarios": (df,),
+        }
+        for pestana, nombre_pagina in zip(st.tabs(list(PAGINAS)), PAGINAS):
+            with pestana:
+                obtener_pagina(nombre_pagina)(*argumentos_pagina[nombre_pagina])
 
     except Exception as e:
         st.error(f"Ha ocurrido un error en la aplicación: {str(e)}")
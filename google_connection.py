@@ -4,7 +4,7 @@ from google.oauth2.service_account import Credentials
 import gspread
 import os
 import json
-from config import SHEET_ID, SHEET_NAME
+from config import SHEET_ID, SHEET_NAME, CACHE_TTL
 
 @st.cache_resource(ttl=3600)
 def connect_to_gsheets():
@@ -53,7 +53,7 @@ def connect_to_gsheets():
         st.error(f"Error al conectar con Google Sheets: {e}")
         return None
 
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
 def load_data():
     """
     Carga datos de la hoja DIOR de Google Sheets.
@@ -131,6 +131,11 @@ def clean_dataframe(df):
             
             # Si más del 80% de los valores son numéricos, convertir la columna
             if numeric_count / len(non_empty_values) > 0.8:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                valores = pd.to_numeric(df[col], errors='coerce')
+                # Las columnas enteras se guardan en el tipo más pequeño que las contiene
+                # (sin pérdida); las de punto flotante se mantienen en float64
+                if pd.api.types.is_integer_dtype(valores):
+                    valores = pd.to_numeric(valores, downcast='integer')
+                df[col] = valores
     
     return df
\ No newline at end of file
@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 
-from analisis_dior import interpretar_promedio
+from analisis_dior import (
+    interpretar_promedio, interpretar_promedios, COLORES_INTERPRETACION,
+    analisis_clusters, generar_visualizaciones
+)
 
 def mostrar_clusters(resultados, figuras, n_clusters):
     """
@@ -23,7 +27,7 @@ def mostrar_clusters(resultados, figuras, n_clusters):
     st.subheader("Visualización de Clusters")
     
     if "clusters_pca" in figuras:
-        st.plotly_chart(figuras["clusters_pca"], use_container_width=True)
+        st.plotly_chart(figuras["clusters_pca"](), use_container_width=True)
         
         # Agregar explicación sobre la visualización PCA
         st.markdown("""
@@ -42,35 +46,42 @@ def mostrar_clusters(resultados, figuras, n_clusters):
     
     if "clusters" in resultados and "perfiles_clusters" in resultados["clusters"]:
         perfiles = resultados["clusters"]["perfiles_clusters"]
+        categorias_comedores = resultados["clusters"].get("categorias_comedores")
         
         for cluster_id, perfil in perfiles.items():
             with st.expander(f"Cluster {cluster_id} ({perfil['n_comedores']} comedores)"):
-                mostrar_detalle_cluster(cluster_id, perfil)
+                mostrar_detalle_cluster(cluster_id, perfil, categorias_comedores)
 
-def mostrar_detalle_cluster(cluster_id, perfil):
+def mostrar_detalle_cluster(cluster_id, perfil, categorias_comedores=None):
     """
     Muestra el detalle de un cluster específico.
     
     Args:
         cluster_id: ID del cluster
         perfil: Diccionario con información del perfil del cluster
+        categorias_comedores: Nombres de los comedores indexados por código
     """
-    # Mostrar lista de comedores en el cluster
-    if "comedores" in perfil:
+    # Mostrar lista de comedores en el cluster (los nombres se obtienen aquí a partir de los códigos)
+    if "codigos_comedores" in perfil and categorias_comedores is not None:
+        codigos = perfil["codigos_comedores"]
         st.markdown("#### Comedores en este cluster:")
-        st.write(", ".join(perfil["comedores"]))
+        st.write(", ".join(categorias_comedores[codigos[codigos >= 0]].astype(str)))
     
     # Mostrar promedios por dimensión
     st.markdown("#### Puntuaciones por dimensión:")
     
+    total_dimensiones = len(perfil["promedios_dimensiones"])
+    dimensiones = np.fromiter(perfil["promedios_dimensiones"].keys(), dtype=object, count=total_dimensiones)
+    puntuaciones = np.fromiter(perfil["promedios_dimensiones"].values(), dtype=np.float64, count=total_dimensiones)
+    
+    # Ordenar de mayor a menor puntuación e interpretar en una sola pasada vectorizada
+    orden = np.argsort(-puntuaciones, kind="stable")
     promedios_dim = pd.DataFrame({
-        "Dimensión": list(perfil["promedios_dimensiones"].keys()),
-        "Puntuación": list(perfil["promedios_dimensiones"].values())
+        "Dimensión": dimensiones[orden],
+        "Puntuación": puntuaciones[orden],
+        "Interpretación": interpretar_promedios(puntuaciones[orden])
     })
     
-    promedios_dim["Interpretación"] = promedios_dim["Puntuación"].apply(interpretar_promedio)
-    promedios_dim = promedios_dim.sort_values("Puntuación", ascending=False)
-    
     # Configurar columnas para mejor visualización
     st.dataframe(
         promedios_dim,
@@ -104,7 +115,7 @@ def mostrar_detalle_cluster(cluster_id, perfil):
         interpretacion = interpretar_promedio(promedio_general)
         
         # Decidir color según interpretación
-        color = "#2ca02c" if interpretacion == "Favorable" else "#ffbb78" if interpretacion == "Neutral" else "#d62728"
+        color = COLORES_INTERPRETACION[interpretacion]
         
         st.markdown(f"""
         <div style="background-color:#f0f2f6; padding:15px; border-radius:5px; margin-top:20px;">
@@ -120,11 +131,9 @@ def mostrar_detalle_cluster(cluster_id, perfil):
         st.markdown("#### Resumen del perfil")
         
         # Determinar tipo de perfil basado en puntuaciones
-        cantidad_favorables = sum(1 for dim, valor in perfil["promedios_dimensiones"].items() if valor >= 2.5)
-        cantidad_neutrales = sum(1 for dim, valor in perfil["promedios_dimensiones"].items() if 1.5 <= valor < 2.5)
-        cantidad_desfavorables = sum(1 for dim, valor in perfil["promedios_dimensiones"].items() if valor < 1.5)
-        
-        total_dimensiones = len(perfil["promedios_dimensiones"])
+        cantidad_favorables = np.count_nonzero(puntuaciones >= 2.5)
+        cantidad_neutrales = np.count_nonzero((puntuaciones >= 1.5) & (puntuaciones < 2.5))
+        cantidad_desfavorables = np.count_nonzero(puntuaciones < 1.5)
         
         if cantidad_favorables >= total_dimensiones * 0.7:
             tipo_perfil = "Perfil Favorable"
@@ -170,10 +179,20 @@ def mostrar_detalle_cluster(cluster_id, perfil):
 
 # Agregar al final del archivo:
 if __name__ == "__main__":
-    if "resultados_actuales" in st.session_state and "figuras_actuales" in st.session_state:
-        resultados = st.session_state["resultados_actuales"]
-        figuras = st.session_state["figuras_actuales"]
-        n_clusters = st.session_state.get("n_clusters", 3)
+    if "df" in st.session_state and st.session_state.get("df_prep") is not None:
+        df = st.session_state["df"]
+        df_prep = st.session_state["df_prep"]
+        
+        # La aplicación principal no calcula los clusters: se calculan aquí con el
+        # número elegido (cacheado por datos y número de clusters)
+        n_clusters = st.sidebar.slider(
+            "Número de clusters", min_value=2, max_value=5, value=3, key="n_clusters",
+            help="Selecciona el número de grupos para el análisis de clusters"
+        )
+        
+        with st.spinner("Agrupando comedores..."):
+            resultados = {"clusters": analisis_clusters(df, df_prep, n_clusters)}
+            figuras = generar_visualizaciones(resultados)
         
         mostrar_clusters(resultados, figuras, n_clusters)
     else:
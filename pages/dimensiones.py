@@ -1,29 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-
-# Importar las constantes necesarias y funciones auxiliares si es necesario
-# Asumiendo que MAPEO_RESPUESTAS está definido en analisis_dior.py o aquí
-try:
-    from analisis_dior import MAPEO_RESPUESTAS
-except ImportError:
-    # Definir localmente si no se puede importar
-    MAPEO_RESPUESTAS = {
-        "DE ACUERDO": 3,
-        "NI DEACUERDO, NI EN DESACUERDO": 2,
-        "EN DESACUERDO": 1
-    }
-
-# Mapeo inverso para mostrar respuestas textuales
-MAPEO_INVERSO = {v: k for k, v in MAPEO_RESPUESTAS.items()}
-
-def mostrar_dimensiones(resultados, figuras):
+
+# Importar las constantes y constructores de figuras
+from analisis_dior import ETIQUETAS_VALORES, figura_promedios_dimensiones, figura_promedios_preguntas
+
+def mostrar_dimensiones(resultados, figuras, df_prep=None):
     """
     Muestra la página de análisis por dimensiones del clima organizacional.
 
     Args:
         resultados: Diccionario con los resultados del análisis
         figuras: Diccionario con las figuras generadas
+        df_prep: DataFrame preparado con las respuestas numéricas de cada comedor
     """
     st.markdown('<div class="section-header">Análisis por Dimensiones</div>', unsafe_allow_html=True)
 
@@ -34,27 +22,8 @@ def mostrar_dimensiones(resultados, figuras):
     if "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]:
         promedios_df = resultados["dimensiones"]["promedios_dimensiones"]
         if not promedios_df.empty:
-            # Recrear figura de barras aquí para asegurar consistencia
-            fig_promedios_bar = px.bar(
-                promedios_df,
-                x="Dimensión",
-                y="Promedio",
-                color="Interpretación",
-                title="Puntuación Promedio por Dimensión",
-                color_discrete_map={
-                    "Favorable": "#2ca02c",
-                    "Neutral": "#ffbb78",
-                    "Desfavorable": "#d62728"
-                },
-                text="Promedio"
-            )
-            fig_promedios_bar.update_traces(texttemplate="%{text:.2f}", textposition="outside")
-            fig_promedios_bar.update_layout(
-                xaxis_title="Dimensión",
-                yaxis_title="Puntuación Promedio (1-3)",
-                yaxis=dict(range=[0, 3.2]),
-                legend_title="Interpretación"
-            )
+            # Figura cacheada como recurso (la vista general usa otro título, así que tiene su propia entrada)
+            fig_promedios_bar = figura_promedios_dimensiones(promedios_df)
             st.plotly_chart(fig_promedios_bar, use_container_width=True)
         else:
             st.info("No hay datos de promedios por dimensión.")
@@ -88,43 +57,12 @@ def mostrar_dimensiones(resultados, figuras):
 
             # Verificar si hay promedios para mostrar
             if promedio_preguntas:
-                df_promedio = pd.DataFrame({
-                    # Usar nombre original para el gráfico, el eje x lo mostrará
-                    "Pregunta": list(promedio_preguntas.keys()),
-                    "Promedio": list(promedio_preguntas.values())
-                })
-
-                # Crear nombres legibles para el eje x (truncados si son largos)
-                nombres_legibles_eje = [p.replace("_", " ").replace(".", ". ", 1) for p in df_promedio["Pregunta"]]
-                nombres_legibles_eje = [name[:30] + '...' if len(name) > 30 else name for name in nombres_legibles_eje]
-
-
-                fig_prom_dim = px.bar(
-                    df_promedio,
-                    x="Pregunta", # Usar la columna original para datos
-                    y="Promedio",
-                    title=f"Promedios de Preguntas en {dimension_seleccionada}",
-                    color="Promedio",
-                    color_continuous_scale="YlGnBu", # Escala de color
-                    text="Promedio"
-                )
-
-                fig_prom_dim.update_traces(texttemplate="%{text:.2f}", textposition="outside")
-                fig_prom_dim.update_layout(
-                    xaxis_title="Pregunta",
-                    yaxis_title="Puntuación Promedio (1-3)",
-                    yaxis=dict(range=[0, 3.2]),
-                    xaxis=dict(
-                        tickmode='array',
-                        tickvals=df_promedio["Pregunta"], # Valores originales
-                        ticktext=nombres_legibles_eje # Etiquetas legibles
-                    )
-                )
-
+                # Figura cacheada por los promedios de la dimensión seleccionada
+                fig_prom_dim = figura_promedios_preguntas(promedio_preguntas, dimension_seleccionada)
                 st.plotly_chart(fig_prom_dim, use_container_width=True)
 
                 # Llamar a la función para mostrar detalles por pregunta
-                mostrar_detalle_por_pregunta(resultados, promedio_preguntas, dimension_seleccionada)
+                mostrar_detalle_por_pregunta(df_prep, promedio_preguntas, dimension_seleccionada)
             else:
                 st.info(f"No hay promedios de preguntas calculados para la dimensión '{dimension_seleccionada}'.")
         # else: # No es necesario un else aquí, st.selectbox maneja la selección
@@ -134,13 +72,16 @@ def mostrar_dimensiones(resultados, figuras):
         st.warning("No se encontraron datos de análisis por dimensiones o preguntas.")
 
 
-def mostrar_detalle_por_pregunta(resultados, promedio_preguntas, dimension_seleccionada):
+@st.fragment
+def mostrar_detalle_por_pregunta(df_preparado, promedio_preguntas, dimension_seleccionada):
     """
     Muestra detalles de los comedores por pregunta específica, filtrando por respuestas
     Neutrales o Desfavorables (1 o 2) y añade un resumen de intervención.
 
+    Se ejecuta como fragmento: cambiar de pregunta solo vuelve a ejecutar esta sección.
+
     Args:
-        resultados: Diccionario con los resultados de análisis
+        df_preparado: DataFrame preparado con las respuestas numéricas de cada comedor
         promedio_preguntas: Diccionario con promedios por pregunta (para obtener la lista de preguntas)
         dimension_seleccionada: Dimensión seleccionada para análisis
     """
@@ -167,9 +108,6 @@ def mostrar_detalle_por_pregunta(resultados, promedio_preguntas, dimension_selec
         # Obtener el nombre original de la columna de la pregunta
         pregunta_seleccionada_original = mapeo_legible_original[pregunta_legible_seleccionada]
 
-        # Acceder a df_prep desde el diccionario 'resultados'
-        df_preparado = resultados.get("datos_preparados")
-
         # Asegurarse de que df_preparado esté disponible y tenga las columnas necesarias
         if df_preparado is not None and pregunta_seleccionada_original in df_preparado.columns and "NOMBRE_COMEDOR" in df_preparado.columns:
 
@@ -184,8 +122,8 @@ def mostrar_detalle_por_pregunta(resultados, promedio_preguntas, dimension_selec
                     pregunta_seleccionada_original: "Respuesta Numérica"
                 }, inplace=True)
 
-                # Añadir respuesta textual usando el mapeo inverso
-                df_mostrar["Respuesta Textual"] = df_mostrar["Respuesta Numérica"].map(MAPEO_INVERSO)
+                # Añadir respuesta textual indexando las etiquetas por valor numérico
+                df_mostrar["Respuesta Textual"] = ETIQUETAS_VALORES[df_mostrar["Respuesta Numérica"].to_numpy()]
 
                 # Ordenar por respuesta numérica (primero los 1, luego los 2)
                 df_mostrar = df_mostrar.sort_values(by="Respuesta Numérica", ascending=True)
@@ -225,12 +163,12 @@ if __name__ == "__main__":
         if not resultados["dimensiones"].get("analisis_preguntas"):
              resultados["dimensiones"]["analisis_preguntas"] = {
                  "Dimensión Ejemplo": {
-                     "Pregunta_Ejemplo_1": {"promedio": 2.5, "distribucion": pd.DataFrame()},
-                     "Pregunta_Ejemplo_2": {"promedio": 1.8, "distribucion": pd.DataFrame()}
+                     "Pregunta_Ejemplo_1": {"promedio": 2.5, "distribucion": {"Respuesta": [], "Cantidad": [], "Porcentaje": []}},
+                     "Pregunta_Ejemplo_2": {"promedio": 1.8, "distribucion": {"Respuesta": [], "Cantidad": [], "Porcentaje": []}}
                  }
              }
-        if "datos_preparados" not in resultados:
-             resultados["datos_preparados"] = pd.DataFrame({ # Simular df_prep
+        if "df_prep" not in st.session_state:
+             st.session_state["df_prep"] = pd.DataFrame({ # Simular df_prep
                  "NOMBRE_COMEDOR": ["Comedor A", "Comedor B", "Comedor C"],
                  "Pregunta_Ejemplo_1": [3, 2, 1],
                  "Pregunta_Ejemplo_2": [2, 1, 1]
@@ -242,7 +180,7 @@ if __name__ == "__main__":
 
 
         # Llamar a la función principal de esta página
-        mostrar_dimensiones(resultados, figuras)
+        mostrar_dimensiones(resultados, figuras, st.session_state["df_prep"])
     else:
         st.error("No hay datos disponibles. Por favor, carga los datos desde la página principal.")
 
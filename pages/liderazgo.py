@@ -8,13 +8,15 @@ import plotly.express as px # Importar plotly express
 
 # --- Funciones para Mostrar Contenido ---
 
-def mostrar_liderazgo(resultados, df):
+def mostrar_liderazgo(resultados, df_prep, resultados_liderazgo=None):
     """
     Muestra la página de análisis comparativo de liderazgo por rol.
 
     Args:
         resultados: Diccionario con los resultados del análisis general
-        df: DataFrame con los datos originales (puede no ser necesario si df_prep está en resultados)
+        df_prep: DataFrame preparado con las respuestas numéricas y el rol de cada registro
+        resultados_liderazgo: Resultados del análisis de liderazgo ya calculados a partir
+            de df_prep (opcional); si no se reciben, se calculan
     """
     st.markdown('<div class="section-header">Análisis Comparativo de Liderazgo por Rol</div>', unsafe_allow_html=True)
 
@@ -31,7 +33,7 @@ def mostrar_liderazgo(resultados, df):
     """)
 
     # Verificar si los datos preparados están disponibles
-    if "datos_preparados" not in resultados:
+    if df_prep is None:
         st.error("Los datos preparados necesarios para el análisis de liderazgo no se encontraron.")
         return
 
@@ -39,9 +41,10 @@ def mostrar_liderazgo(resultados, df):
     try:
         from analisis_dior import analisis_liderazgo_por_rol, generar_visualizaciones_liderazgo_por_rol
         with st.spinner("Analizando datos de liderazgo por rol..."):
-            # Usar los datos preparados que ya están en el diccionario 'resultados'
-            resultados_liderazgo = analisis_liderazgo_por_rol(resultados["datos_preparados"])
-            figuras_liderazgo = generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo)
+            # Reutilizar el análisis precalculado por la aplicación principal si existe
+            if resultados_liderazgo is None:
+                resultados_liderazgo = analisis_liderazgo_por_rol(df_prep)
+            figuras_liderazgo = generar_visualizaciones_liderazgo_por_rol(resultados_liderazgo, df_prep)
 
     except ImportError:
         st.error("No se pudieron importar las funciones de análisis de liderazgo desde 'analisis_dior.py'.")
@@ -182,10 +185,13 @@ def mostrar_explicacion_concordancia(resultados_liderazgo):
         st.info("Resumen de concordancia no disponible.")
 
 
+@st.fragment
 def mostrar_detalle_por_comedor(resultados_liderazgo):
     """
     Muestra la exploración detallada por comedor.
 
+    Se ejecuta como fragmento: cambiar de comedor solo vuelve a ejecutar esta sección.
+
     Args:
         resultados_liderazgo: Diccionario con los resultados del análisis de liderazgo
     """
@@ -336,19 +342,17 @@ def crear_radar_comedor(detalles, comedor_seleccionado):
 if __name__ == "__main__":
     # Simular datos de sesión si no existen (para pruebas)
     if "resultados_actuales" not in st.session_state:
+         st.session_state["resultados_actuales"] = {}
+    if "df_prep" not in st.session_state:
          # Crear datos simulados mínimos para que las funciones no fallen
-         st.session_state["resultados_actuales"] = {
-             "datos_preparados": pd.DataFrame({ # Simular df_prep
-                 "NOMBRE_COMEDOR": ["Comedor A", "Comedor A", "Comedor B", "Comedor B", "Comedor C"],
-                 "ROL": ["GESTORA/OR PRINCIPAL", "GESTORA/OR  AUXILIAR", "GESTORA/OR PRINCIPAL", "GESTORA/OR  AUXILIAR", "GESTORA/OR PRINCIPAL"],
-                 "2.1_LIDERAZGO_RESPESTUOSO": [3, 1, 2, 2, 3],
-                 "2.2_OPORTUNIDAD_DE_PROPONER_IDEAS": [2, 2, 3, 1, 2],
-                 "2.3_ESPACIOS_ADECUADOS_RETROALIMENTACION": [1, 3, 2, 2, 1]
-             })
-         }
-    if "df" not in st.session_state: # Simular df original si es necesario
-        st.session_state["df"] = st.session_state["resultados_actuales"]["datos_preparados"]
+         st.session_state["df_prep"] = pd.DataFrame({ # Simular df_prep
+             "NOMBRE_COMEDOR": ["Comedor A", "Comedor A", "Comedor B", "Comedor B", "Comedor C"],
+             "ROL": ["GESTORA/OR PRINCIPAL", "GESTORA/OR  AUXILIAR", "GESTORA/OR PRINCIPAL", "GESTORA/OR  AUXILIAR", "GESTORA/OR PRINCIPAL"],
+             "2.1_LIDERAZGO_RESPESTUOSO": [3, 1, 2, 2, 3],
+             "2.2_OPORTUNIDAD_DE_PROPONER_IDEAS": [2, 2, 3, 1, 2],
+             "2.3_ESPACIOS_ADECUADOS_RETROALIMENTACION": [1, 3, 2, 2, 1]
+         })
 
     # Llamar a la función principal de esta página
-    mostrar_liderazgo(st.session_state["resultados_actuales"], st.session_state["df"])
+    mostrar_liderazgo(st.session_state["resultados_actuales"], st.session_state["df_prep"])
 
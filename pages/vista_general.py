@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px # Importar plotly.express
+
+from analisis_dior import COLORES_RESPUESTAS, figura_promedios_dimensiones, figura_distribucion_nodos
 
 
 def generar_analisis_descriptivo_comuna(comunas_df):
@@ -277,14 +278,17 @@ def mostrar_distribucion_demografica(resultados):
                         principal = top_comunas.iloc[0]
                         porcentaje_principal = round((principal["Cantidad"] / total_comedores) * 100, 1) if total_comedores > 0 else 0
                         st.markdown(f"##### Comuna Principal: **{principal['Comuna']}**")
-                        st.markdown(f"📍 {principal['Cantidad']} comedores ({porcentaje_principal}% del total)")
+                        st.markdown(f"📍 {int(principal['Cantidad'])} comedores ({porcentaje_principal}% del total)")
 
                     # Comunas secundarias
                     if len(top_comunas) > 1:
                         st.markdown("##### Comunas Secundarias:")
-                        for i, comuna in top_comunas.iloc[1:].iterrows():
-                            porcentaje = round((comuna["Cantidad"] / total_comedores) * 100, 1) if total_comedores > 0 else 0
-                            st.markdown(f"- Comuna **{comuna['Comuna']}**: {comuna['Cantidad']} ({porcentaje}%)")
+                        secundarias = top_comunas.iloc[1:]
+                        # Una sola lista en markdown en lugar de un mensaje por comuna
+                        st.markdown("\n".join(
+                            f"- Comuna **{comuna}**: {cantidad} ({round((cantidad / total_comedores) * 100, 1) if total_comedores > 0 else 0}%)"
+                            for comuna, cantidad in zip(secundarias["Comuna"], secundarias["Cantidad"])
+                        ))
 
                     # Análisis de concentración
                     st.markdown("##### Concentración Geográfica:")
@@ -301,7 +305,7 @@ def mostrar_distribucion_demografica(resultados):
                         menor = comunas_ordenadas.iloc[-1]
                         porcentaje_menor = round((menor["Cantidad"] / total_comedores) * 100, 1) if total_comedores > 0 else 0
                         st.markdown("##### Menor Representación:")
-                        st.markdown(f"ℹ️ Comuna **{menor['Comuna']}**: {menor['Cantidad']} comedores ({porcentaje_menor}%).")
+                        st.markdown(f"ℹ️ Comuna **{menor['Comuna']}**: {int(menor['Cantidad'])} comedores ({porcentaje_menor}%).")
             else:
                  st.info("No hay datos suficientes para el análisis descriptivo de comunas.")
 
@@ -315,21 +319,7 @@ def mostrar_distribucion_demografica(resultados):
             nodos_df = resultados["descriptivo"]["distribucion_nodos"]
             if not nodos_df.empty:
                 with st.expander("Gráfico: Distribución por Nodo", expanded=True):
-                    fig_nodos = px.bar(
-                        nodos_df,
-                        x="Nodo",
-                        y="Cantidad",
-                        title="Distribución de Comedores por Nodo",
-                        color="Cantidad",
-                        color_continuous_scale="Blues", # Esquema de color azul
-                        text_auto=True
-                    )
-                    fig_nodos.update_layout(
-                        xaxis_title="Nodo",
-                        yaxis_title="Número de Comedores",
-                        xaxis={'categoryorder':'total descending'}, # Ordenar barras
-                        margin=dict(l=20, r=20, t=40, b=20)
-                    )
+                    fig_nodos = figura_distribucion_nodos(nodos_df)
                     st.plotly_chart(fig_nodos, use_container_width=True)
             else:
                 st.info("No hay datos de distribución por nodo disponibles.")
@@ -368,14 +358,16 @@ def mostrar_distribucion_demografica(resultados):
 
                         # Nodo principal
                         st.markdown(f"##### Nodo Principal: **{principal_nodo['Nodo']}**")
-                        st.markdown(f"🔗 {principal_nodo['Cantidad']} comedores ({porcentaje_principal_nodo}% del total)")
+                        st.markdown(f"🔗 {int(principal_nodo['Cantidad'])} comedores ({porcentaje_principal_nodo}% del total)")
 
                         # Nodos secundarios
                         if len(nodos_ordenados) > 1:
                             st.markdown("##### Nodos Secundarios:")
-                            for i, nodo in nodos_ordenados.iloc[1:min(3, len(nodos_ordenados))].iterrows():
-                                porcentaje_nodo = round((nodo["Cantidad"] / total_comedores_nodo) * 100, 1) if total_comedores_nodo > 0 else 0
-                                st.markdown(f"- Nodo **{nodo['Nodo']}**: {nodo['Cantidad']} ({porcentaje_nodo}%)")
+                            secundarios_nodo = nodos_ordenados.iloc[1:min(3, len(nodos_ordenados))]
+                            st.markdown("\n".join(
+                                f"- Nodo **{nodo}**: {cantidad} ({round((cantidad / total_comedores_nodo) * 100, 1) if total_comedores_nodo > 0 else 0}%)"
+                                for nodo, cantidad in zip(secundarios_nodo["Nodo"], secundarios_nodo["Cantidad"])
+                            ))
 
                         # Análisis de concentración
                         st.markdown("##### Concentración Organizativa:")
@@ -392,7 +384,7 @@ def mostrar_distribucion_demografica(resultados):
                             menor_nodo = nodos_ordenados.iloc[-1]
                             diferencia_nodo = principal_nodo["Cantidad"] - menor_nodo["Cantidad"]
                             st.markdown("##### Equilibrio entre Nodos:")
-                            st.markdown(f"📊 **Diferencia**: {diferencia_nodo} comedores entre el mayor (Nodo {principal_nodo['Nodo']}) y el menor (Nodo {menor_nodo['Nodo']}).")
+                            st.markdown(f"📊 **Diferencia**: {int(diferencia_nodo)} comedores entre el mayor (Nodo {principal_nodo['Nodo']}) y el menor (Nodo {menor_nodo['Nodo']}).")
 
                             # Interpretación equidad
                             if diferencia_nodo > principal_nodo["Cantidad"] * 0.5:
@@ -445,8 +437,7 @@ def mostrar_vista_general(resultados, figuras, show_details):
         figuras: Diccionario con las figuras generadas
         show_details: Booleano que indica si se deben mostrar detalles adicionales
     """
-    # --- Métricas principales con formato HTML personalizado ---
-    # Utiliza las clases CSS definidas en app.py
+    # --- Métricas principales ---
     if "descriptivo" in resultados and "total_comedores" in resultados["descriptivo"]:
         col1, col2, col3, col4 = st.columns(4)
 
@@ -459,36 +450,16 @@ def mostrar_vista_general(resultados, figuras, show_details):
 
 
         with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Comedores Analizados</div>
-                <div class="metric-value">{total_comedores}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.metric("Comedores Analizados", total_comedores)
 
         with col2:
-             st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Comunas</div>
-                <div class="metric-value">{total_comunas}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.metric("Comunas", total_comunas)
 
         with col3:
-             st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Nodos</div>
-                <div class="metric-value">{total_nodos}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.metric("Nodos", total_nodos)
 
         with col4:
-             st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-label">Nichos</div>
-                <div class="metric-value">{total_nichos}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.metric("Nichos", total_nichos)
     else:
         st.warning("No se pudieron cargar las métricas principales.")
 
@@ -514,23 +485,15 @@ def mostrar_vista_general(resultados, figuras, show_details):
                 dist_ordenada["Orden"] = dist_ordenada["Respuesta"].map(orden_respuestas)
                 dist_ordenada = dist_ordenada.sort_values("Orden")
 
-                colores = {
-                    "EN DESACUERDO": "#d62728", # Rojo
-                    "NI DEACUERDO, NI EN DESACUERDO": "#ffbb78", # Naranja claro
-                    "DE ACUERDO": "#2ca02c" # Verde
-                }
-
-                fig_barras = go.Figure()
-                for idx, row in dist_ordenada.iterrows():
-                    fig_barras.add_trace(go.Bar(
-                        y=[row["Respuesta"]],
-                        x=[row["Cantidad"]],
-                        orientation='h',
-                        name=row["Respuesta"],
-                        marker_color=colores.get(row["Respuesta"], "#1f77b4"),
-                        text=f"{row['Porcentaje']}% ({row['Cantidad']})", # Mostrar porcentaje y cantidad
-                        textposition='auto'
-                    ))
+                # Una sola traza con todas las barras (color por respuesta)
+                fig_barras = go.Figure(go.Bar(
+                    y=dist_ordenada["Respuesta"],
+                    x=dist_ordenada["Cantidad"],
+                    orientation='h',
+                    marker_color=dist_ordenada["Respuesta"].map(COLORES_RESPUESTAS).fillna("#1f77b4"),
+                    text=dist_ordenada["Porcentaje"].astype(str) + "% (" + dist_ordenada["Cantidad"].astype(str) + ")", # Mostrar porcentaje y cantidad
+                    textposition='auto'
+                ))
 
                 fig_barras.update_layout(
                     #title="Distribución de Respuestas", # Título redundante
@@ -550,12 +513,13 @@ def mostrar_vista_general(resultados, figuras, show_details):
             dist = resultados["descriptivo"]["distribucion_respuestas"]
             if not dist.empty:
                 # Encontrar la respuesta más común
-                respuesta_max = dist.loc[dist["Cantidad"].idxmax()]
+                respuesta_max = dist.iloc[dist["Cantidad"].to_numpy().argmax()]
                 total_respuestas = dist["Cantidad"].sum()
 
                 # Determinar interpretación general
-                de_acuerdo = dist[dist["Respuesta"] == "DE ACUERDO"]["Porcentaje"].iloc[0] if "DE ACUERDO" in dist["Respuesta"].values else 0
-                desacuerdo = dist[dist["Respuesta"] == "EN DESACUERDO"]["Porcentaje"].iloc[0] if "EN DESACUERDO" in dist["Respuesta"].values else 0
+                porcentaje_por_respuesta = dict(zip(dist["Respuesta"], dist["Porcentaje"]))
+                de_acuerdo = porcentaje_por_respuesta.get("DE ACUERDO", 0)
+                desacuerdo = porcentaje_por_respuesta.get("EN DESACUERDO", 0)
 
                 interpretacion = ""
                 color_interpretacion = ""
@@ -580,8 +544,10 @@ def mostrar_vista_general(resultados, figuras, show_details):
                     ({respuesta_max['Porcentaje']}% del total).
                     """)
                     st.markdown("##### Desglose por Respuesta:")
-                    for idx, row in dist.iterrows():
-                        st.markdown(f"- **{row['Respuesta']}**: {row['Cantidad']} ({row['Porcentaje']}%)")
+                    st.markdown("\n".join(
+                        f"- **{respuesta}**: {cantidad} ({porcentaje}%)"
+                        for respuesta, cantidad, porcentaje in zip(dist["Respuesta"], dist["Cantidad"], dist["Porcentaje"])
+                    ))
 
                     st.markdown("##### Interpretación General:")
                     st.markdown(f"""
@@ -600,27 +566,8 @@ def mostrar_vista_general(resultados, figuras, show_details):
     if "dimensiones" in resultados and "promedios_dimensiones" in resultados["dimensiones"]:
         promedios_df = resultados["dimensiones"]["promedios_dimensiones"]
         if not promedios_df.empty:
-             # Recrear figura de barras aquí para asegurar consistencia
-            fig_promedios_bar = px.bar(
-                promedios_df,
-                x="Dimensión",
-                y="Promedio",
-                color="Interpretación",
-                #title="Puntuación Promedio por Dimensión", # Título redundante
-                color_discrete_map={
-                    "Favorable": "#2ca02c",
-                    "Neutral": "#ffbb78",
-                    "Desfavorable": "#d62728"
-                },
-                text="Promedio"
-            )
-            fig_promedios_bar.update_traces(texttemplate="%{text:.2f}", textposition="outside")
-            fig_promedios_bar.update_layout(
-                xaxis_title="Dimensión",
-                yaxis_title="Puntuación Promedio (1-3)",
-                yaxis=dict(range=[0, 3.2]),
-                legend_title="Interpretación"
-            )
+            # Mismo constructor que la página de dimensiones, sin título (es redundante aquí)
+            fig_promedios_bar = figura_promedios_dimensiones(promedios_df, titulo=None)
             st.plotly_chart(fig_promedios_bar, use_container_width=True)
         else:
             st.info("No hay datos de promedios por dimensión.")
@@ -644,15 +591,6 @@ if __name__ == "__main__":
     if "show_details" not in st.session_state:
         st.session_state["show_details"] = True
 
-    # Cargar estilos (necesario si se ejecuta solo)
-    st.markdown("""
-    <style>
-    .metric-card { background-color: #E0F2FE; border-radius: 8px; padding: 16px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); text-align: center; margin-bottom: 10px; height: 100px; display: flex; flex-direction: column; justify-content: center; border: 1px solid #BFDBFE; }
-    .metric-label { font-size: 0.9em; color: #4B5563; margin-bottom: 5px; font-weight: 500; }
-    .metric-value { font-size: 1.8em; font-weight: bold; color: #1E3A8A; line-height: 1.2; }
-    </style>
-    """, unsafe_allow_html=True)
-
     # Llamar a la función principal de esta página
     mostrar_vista_general(
         st.session_state["resultados_actuales"],
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from analisis_dior import (
+    DIMENSIONES,
+    MAPEO_RESPUESTAS,
+    analisis_clusters,
+    analisis_comparativo,
+    analisis_liderazgo_por_rol,
+    calcular_promedios_por_dimension,
+    preparar_datos,
+)
+
+
+def crear_datos_una_dimension(n_filas=30, dimension="Trabajo en equipo"):
+    """
+    Crea respuestas de prueba que solo contienen las preguntas de una dimensión.
+
+    Args:
+        n_filas: Número de registros a generar
+        dimension: Dimensión cuyas preguntas se incluyen
+
+    Returns:
+        DataFrame: Datos con el formato de la hoja DIOR
+    """
+    rng = np.random.default_rng(0)
+    respuestas = np.array(list(MAPEO_RESPUESTAS), dtype=object)
+    datos = {"NOMBRE_COMEDOR": [f"Comedor {i}" for i in range(n_filas)]}
+    for pregunta in DIMENSIONES[dimension]:
+        datos[pregunta] = rng.choice(respuestas, n_filas)
+    return pd.DataFrame(datos)
+
+
+def test_clusters_con_una_sola_dimension():
+    # Con una sola dimensión solo hay un componente principal: el segundo
+    # componente de la visualización se rellena con ceros
+    df = crear_datos_una_dimension()
+    resultados = analisis_clusters(df, preparar_datos(df), 3)
+
+    pca_data = resultados["pca_data"]
+    assert list(pca_data[["PCA1", "PCA2"]].columns) == ["PCA1", "PCA2"]
+    assert len(pca_data) == len(df)
+    assert (pca_data["PCA2"] == 0).all()
+    assert pca_data["PCA1"].abs().sum() > 0
+    assert set(pca_data["Cluster"]) <= {0, 1, 2}
+
+
+def crear_datos_con_comunas(n_filas=40):
+    """
+    Crea respuestas de prueba de todas las dimensiones repartidas en comunas.
+
+    Args:
+        n_filas: Número de registros a generar
+
+    Returns:
+        DataFrame: Datos con el formato de la hoja DIOR
+    """
+    rng = np.random.default_rng(1)
+    respuestas = np.array(list(MAPEO_RESPUESTAS), dtype=object)
+    datos = {
+        "NOMBRE_COMEDOR": [f"Comedor {i}" for i in range(n_filas)],
+        "COMUNA": rng.choice(["Comuna 3", "Comuna 1", "Comuna 2"], n_filas),
+    }
+    for preguntas in DIMENSIONES.values():
+        for pregunta in preguntas:
+            datos[pregunta] = rng.choice(respuestas, n_filas)
+    return pd.DataFrame(datos)
+
+
+def sin_precalculos(df_prep):
+    """
+    Copia un DataFrame preparado sin la matriz guardada en preparar_datos.
+
+    Args:
+        df_prep: DataFrame preparado
+
+    Returns:
+        DataFrame: Copia sin attrs, que obliga a recalcular desde las columnas
+    """
+    copia = df_prep.copy()
+    copia.attrs = {}
+    return copia
+
+
+def test_comparativo_con_filas_reordenadas():
+    # sort_values conserva los attrs de preparar_datos: la matriz guardada ya
+    # no corresponde a las filas y debe recalcularse. Los promedios por comuna
+    # no dependen del orden de las filas
+    df = crear_datos_con_comunas()
+    df_prep = preparar_datos(df)
+
+    resultado = analisis_comparativo(df, df_prep.sort_values("COMUNA"))["comparacion_comunas"]
+    esperado = analisis_comparativo(df, df_prep)["comparacion_comunas"]
+
+    pd.testing.assert_frame_equal(resultado.sort_index(), esperado.sort_index())
+
+
+def test_promedios_con_filas_remuestreadas():
+    # Mismo número de filas pero distinto contenido: los promedios guardados
+    # en preparar_datos no deben reutilizarse
+    df_prep = preparar_datos(crear_datos_con_comunas())
+    muestra = df_prep.sample(frac=1, replace=True, random_state=0)
+
+    promedios = calcular_promedios_por_dimension(muestra)
+    esperados = calcular_promedios_por_dimension(sin_precalculos(muestra))
+
+    assert promedios.keys() == esperados.keys()
+    np.testing.assert_allclose(list(promedios.values()), list(esperados.values()))
+
+
+def test_liderazgo_por_rol_calculado_a_mano():
+    # Comedor A: dos principales cuyo promedio coincide con el auxiliar (Alta).
+    # Comedor B: diferencias 2, 1 y 0 (Baja global). Comedor sin nombre:
+    # diferencia 1 en todo (Media). Comedor C solo tiene principal y el
+    # registro sin rol se descarta
+    principal, auxiliar = "GESTORA/OR PRINCIPAL", "GESTORA/OR  AUXILIAR"
+    df_prep = pd.DataFrame({
+        "NOMBRE_COMEDOR": ["A", "A", "A", "B", "B", np.nan, np.nan, "C", "D"],
+        "ROL": [principal, principal, auxiliar, principal, auxiliar,
+                principal, auxiliar, principal, np.nan],
+        "2.1_LIDERAZGO_RESPESTUOSO": [3, 1, 2, 3, 1, 2, 1, 1, 3],
+        "2.2_OPORTUNIDAD_DE_PROPONER_IDEAS": [2, 2, 2, 3, 2, 2, 1, 1, 3],
+        "2.3_ESPACIOS_ADECUADOS_RETROALIMENTACION": [1, 3, 2, 3, 3, 2, 1, 1, 3],
+    })
+
+    resultados = analisis_liderazgo_por_rol(df_prep)
+
+    assert resultados["total_comedores"] == 4
+    assert resultados["comedores_con_principal"] == 4
+    assert resultados["comedores_con_auxiliar"] == 3
+    assert resultados["comedores_con_ambos_roles"] == 3
+    assert resultados["resumen_concordancia"] == {"Alta": 1, "Media": 1, "Baja": 1}
+
+    globales = resultados["analisis_global"]
+    np.testing.assert_allclose(
+        [globales[p]["promedio_principal"] for p in globales], [2.0, 2.0, 2.0]
+    )
+    np.testing.assert_allclose(
+        [globales[p]["promedio_auxiliar"] for p in globales], [4 / 3, 5 / 3, 2.0]
+    )
+
+    comedores = resultados["analisis_comedores"]
+    assert [c for c in comedores if not pd.isna(c)] == ["A", "B"]
+    (sin_nombre,) = [datos for c, datos in comedores.items() if pd.isna(c)]
+
+    comedor_a = comedores["A"]
+    assert comedor_a["concordancia_global"] == "Alta"
+    assert comedor_a["diferencia_promedio"] == 0
+    respetuoso_a = comedor_a["analisis_preguntas"]["2.1_LIDERAZGO_RESPESTUOSO"]
+    assert respetuoso_a["valores_principal"] == [3, 1]
+    assert respetuoso_a["valores_auxiliar"] == [2]
+    assert respetuoso_a["promedio_principal"] == 2
+
+    comedor_b = comedores["B"]
+    assert comedor_b["concordancia_global"] == "Baja"
+    assert comedor_b["diferencia_promedio"] == 1
+    assert [datos["concordancia"] for datos in comedor_b["analisis_preguntas"].values()] == [
+        "Baja", "Media", "Alta"
+    ]
+    assert [datos["diferencia"] for datos in comedor_b["analisis_preguntas"].values()] == [2, 1, 0]
+
+    assert sin_nombre["concordancia_global"] == "Media"
+    retroalimentacion = sin_nombre["analisis_preguntas"]["2.3_ESPACIOS_ADECUADOS_RETROALIMENTACION"]
+    assert retroalimentacion["valores_principal"] == [2]
+    assert retroalimentacion["valores_auxiliar"] == [1]
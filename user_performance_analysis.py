@@ -9,7 +9,27 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import re
+import streamlit as st
 
+from analisis_dior import HASH_FUNCS
+
+def contar_unicos_por_usuario(df_usuarios, columna):
+    """
+    Cuenta los valores distintos de una columna para cada usuario.
+    
+    Args:
+        df_usuarios (DataFrame): Registros con la columna USER normalizada
+        columna (str): Columna a contar
+        
+    Returns:
+        ndarray o int: Cantidad por usuario (en el orden de groupby('USER')), o 0 si
+                       la columna no existe
+    """
+    if columna not in df_usuarios.columns:
+        return 0
+    return df_usuarios[columna].groupby(df_usuarios['USER']).nunique().to_numpy()
+
+@st.cache_data(show_spinner=False, hash_funcs=HASH_FUNCS)
 def analizar_desempeno_usuarios(df):
     """
     Realiza un análisis de desempeño de los usuarios que registran las visitas.
@@ -26,8 +46,9 @@ def analizar_desempeno_usuarios(df):
     if 'USER' not in df.columns:
         return {"error": "No se encontró la columna USER en los datos"}
     
-    # Eliminar filas donde USER está vacío
-    df_usuarios = df[df['USER'].notna() & (df['USER'] != '')].copy()
+    # Eliminar filas donde USER está vacío (el filtrado ya crea un DataFrame nuevo,
+    # así que basta una copia superficial para poder reemplazar la columna USER)
+    df_usuarios = df[df['USER'].notna() & (df['USER'] != '')].copy(deep=False)
     
     if df_usuarios.empty:
         return {"error": "No hay datos de usuarios para analizar"}
@@ -48,53 +69,46 @@ def analizar_desempeno_usuarios(df):
     resultados['total_registros'] = total_registros
     
     # 2. Analizar completitud de datos por usuario
-    analisis_completitud = []
     
     # Obtener todas las columnas de preguntas por dimensión
-    from analisis_dior import DIMENSIONES
+    from analisis_dior import DIMENSIONES, calcular_columnas_dimension
     columnas_preguntas = []
     for dimension, preguntas in DIMENSIONES.items():
         columnas_preguntas.extend(preguntas)
     
-    for usuario, grupo in df_usuarios.groupby('USER'):
-        # Calcular el porcentaje de celdas no vacías para las preguntas de la encuesta
-        
-        # Para cada registro, calcular cuántas preguntas fueron respondidas
-        total_posibles = len(columnas_preguntas) * len(grupo)
-        respondidas = 0
-        
-        for pregunta in columnas_preguntas:
-            if pregunta in grupo.columns:
-                respondidas += grupo[pregunta].notna().sum()
-        
-        # Calcular el porcentaje de completitud
-        if total_posibles > 0:
-            porcentaje_completitud = round(respondidas / total_posibles * 100, 2)
-        else:
-            porcentaje_completitud = 0
-        
-        # Calcular promedio de respuestas por comedor
-        promedio_por_comedor = respondidas / len(grupo) if len(grupo) > 0 else 0
-        
-        # Cantidad de comedores únicos visitados
-        comedores_unicos = grupo['NOMBRE_COMEDOR'].nunique() if 'NOMBRE_COMEDOR' in grupo.columns else 0
-        
-        # Análisis de comunas y nodos
-        comunas_visitadas = grupo['COMUNA'].nunique() if 'COMUNA' in grupo.columns else 0
-        nodos_visitados = grupo['NODO'].nunique() if 'NODO' in grupo.columns else 0
-        
-        # Guardar resultados
-        analisis_completitud.append({
-            'Usuario': usuario,
-            'Registros': len(grupo),
-            'Comedores Visitados': comedores_unicos,
-            'Comunas Visitadas': comunas_visitadas,
-            'Nodos Visitados': nodos_visitados,
-            'Completitud (%)': porcentaje_completitud,
-            'Promedio Respuestas por Comedor': promedio_por_comedor,
-        })
-    
-    df_completitud = pd.DataFrame(analisis_completitud)
+    # Preguntas presentes en los datos (se determinan una sola vez, no por usuario)
+    preguntas_existentes = [
+        pregunta
+        for preguntas in calcular_columnas_dimension(df_usuarios.columns).values()
+        for pregunta in preguntas
+    ]
+    
+    # Todas las métricas por usuario se calculan con agregaciones agrupadas
+    usuarios = df_usuarios['USER']
+    registros = usuarios.groupby(usuarios).size()
+    
+    # Cuántas preguntas fueron respondidas (celdas no vacías) por usuario
+    if preguntas_existentes:
+        respondidas = df_usuarios[preguntas_existentes].notna().groupby(usuarios).sum().sum(axis=1)
+    else:
+        respondidas = pd.Series(0, index=registros.index)
+    
+    # Porcentaje de completitud sobre todas las preguntas de la encuesta
+    total_posibles = len(columnas_preguntas) * registros
+    if len(columnas_preguntas) > 0:
+        porcentaje_completitud = (respondidas / total_posibles * 100).round(2)
+    else:
+        porcentaje_completitud = pd.Series(0, index=registros.index)
+    
+    df_completitud = pd.DataFrame({
+        'Usuario': registros.index.to_numpy(),
+        'Registros': registros.to_numpy(),
+        'Comedores Visitados': contar_unicos_por_usuario(df_usuarios, 'NOMBRE_COMEDOR'),
+        'Comunas Visitadas': contar_unicos_por_usuario(df_usuarios, 'COMUNA'),
+        'Nodos Visitados': contar_unicos_por_usuario(df_usuarios, 'NODO'),
+        'Completitud (%)': porcentaje_completitud.to_numpy(),
+        'Promedio Respuestas por Comedor': (respondidas / registros).to_numpy(),
+    })
     resultados['analisis_completitud'] = df_completitud
     
     # 3. Análisis por fecha (asumiendo que existe una columna de fecha)
@@ -117,19 +131,20 @@ def analizar_desempeno_usuarios(df):
     # Si se encuentra una columna de fecha, realizar análisis por fecha
     if columna_fecha:
         try:
-            # Crear una copia para no modificar el DataFrame original
-            df_con_fecha = df_usuarios.copy()
-            
             # Intentar convertir la columna a datetime
             # Primero intentar con pd.to_datetime directamente
             try:
-                df_con_fecha['fecha_procesada'] = pd.to_datetime(df_con_fecha[columna_fecha], errors='coerce')
+                fecha_procesada = pd.to_datetime(df_usuarios[columna_fecha], errors='coerce')
             except:
                 # Si falla, intentar extraer fecha con expresiones regulares (formatos comunes)
                 # Buscar patrones como DD/MM/YYYY, YYYY-MM-DD, etc.
                 fecha_pattern = r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2})'
-                df_con_fecha['fecha_extraida'] = df_con_fecha[columna_fecha].astype(str).str.extract(fecha_pattern, expand=False)
-                df_con_fecha['fecha_procesada'] = pd.to_datetime(df_con_fecha['fecha_extraida'], errors='coerce')
+                fecha_extraida = df_usuarios[columna_fecha].astype(str).str.extract(fecha_pattern, expand=False)
+                fecha_procesada = pd.to_datetime(fecha_extraida, errors='coerce')
+            
+            # Solo se necesitan el usuario y la fecha: se arma un DataFrame pequeño
+            # en lugar de copiar todas las columnas de los registros
+            df_con_fecha = pd.DataFrame({'USER': df_usuarios['USER'], 'fecha_procesada': fecha_procesada})
             
             # Filtrar registros con fechas válidas
             df_fechas_validas = df_con_fecha[df_con_fecha['fecha_procesada'].notna()].copy()
@@ -181,10 +196,14 @@ def analizar_desempeno_usuarios(df):
     
     return resultados
 
+@st.cache_resource(show_spinner=False, hash_funcs=HASH_FUNCS)
 def generar_visualizaciones_desempeno(resultados_usuarios):
     """
     Genera visualizaciones simplificadas para el análisis de desempeño de usuarios.
     
+    Se guarda como recurso por el contenido de los resultados: las figuras se
+    comparten entre ejecuciones y no deben modificarse.
+    
     Args:
         resultados_usuarios (dict): Resultados del análisis de desempeño
         